@@ -0,0 +1,239 @@
+"""
+Per-stage frame benchmark
+
+Times every stage of a main.py frame on its own and a whole frame end to end,
+with fixed seeds, and writes percentiles as JSON. Run from the repository root:
+
+    python -m benchmarks.frame_stages --output bench.json
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import numpy
+import PIL
+from PIL import ImageDraw
+
+from game.constants import WIDTH, HEIGHT, COLOR_GREEN, COLOR_RED
+from game.display_config import DISPLAY_HAT_MINI
+from game.atlas import open_sprites
+from game.sprite_registry import SpriteRegistry
+from game.compositor import LayerCompositor, ShipCompositor, Canvas, blit
+from game.starfield import Starfield
+from game.damage import DamageTracker, sprite_box
+from game.framebuffer import Framebuffer
+from game.display_backend import HeadlessBackend
+from game.text_cache import text_cache
+from game.fonts import fonts
+from game.events import EventGenerator
+from game.ui import StatusBar, EventCards
+from game.scene import STAR_LAYERS, SHIP_SIZE, SHIP_SLOTS, FLAME_OFFSET, AMBIENT_LIGHTS, ship_position, draw_light
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+def summarize(samples):
+    """
+    Reduce timings to the statistics written out
+
+    Args:
+        samples: Durations in seconds
+
+    Returns:
+        dict: Iterations, mean, min, max and percentiles in microseconds
+    """
+    micros = numpy.array(samples) * 1e6
+    summary = {
+        "iterations": len(samples),
+        "mean_us": round(float(micros.mean()), 2),
+        "min_us": round(float(micros.min()), 2),
+        "max_us": round(float(micros.max()), 2),
+    }
+    for percentile in PERCENTILES:
+        summary[f"p{percentile}_us"] = round(float(numpy.percentile(micros, percentile)), 2)
+    return summary
+
+
+def measure(stage, iterations, warmup):
+    """Time a stage function, each call separately, after some untimed warmup calls"""
+    for _ in range(warmup):
+        stage()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        stage()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Scene:
+    """The game screen rebuilt without the intro, so each stage can be run on its own"""
+
+    def __init__(self, seed):
+        random.seed(seed)
+        self.sprites = open_sprites()
+        registry = SpriteRegistry(self.sprites)
+        builder = ShipCompositor(SHIP_SIZE, [(name, position) for name, position, _, _ in SHIP_SLOTS])
+        for name, _, prefix, count in SHIP_SLOTS:
+            builder.set_part(name, registry.random(prefix, count))
+        self.ship = builder.image().copy()
+        self.flames = [self.sprites.get(f"flame{i}") for i in range(1, 5)]
+        self.hud = self.sprites.get("hud").resize((WIDTH, HEIGHT))
+
+        self.starfield = Starfield(WIDTH, HEIGHT, STAR_LAYERS, seed=seed)
+        self.framebuffer = Framebuffer(WIDTH, HEIGHT)
+        self.draw = ImageDraw.Draw(self.framebuffer.image)
+        self.display = HeadlessBackend(WIDTH, HEIGHT)
+        self.font = fonts.get()
+
+        self.status_bar = StatusBar(DISPLAY_HAT_MINI, 1, False, 10, 2, [], 0)
+        self.status_bar.update(1, False, 10, 2, [], 12345)
+        generator = EventGenerator()
+        self.event_cards = EventCards(DISPLAY_HAT_MINI)
+        self.event_display = self.event_cards.display(generator.generate_event())
+
+        self.ship_position = ship_position(self.ship)
+        self.flame_position = (self.ship_position[0] + FLAME_OFFSET[0], self.ship_position[1] + FLAME_OFFSET[1])
+        self.playfield_height = HEIGHT - self.status_bar.height
+        self.hud_texts = (
+            ("Boost: 10", (25, 10), COLOR_GREEN),
+            ("2 :Repair", (WIDTH - fonts.metrics(self.font).textlength("2 :Repair") - 25, 10), COLOR_RED),
+        )
+
+        self.damage = DamageTracker(WIDTH, HEIGHT)
+        self.damage.clear()
+        self.flame_box = sprite_box(self.flames, *self.flame_position)
+        self.compositor = LayerCompositor(WIDTH, HEIGHT)
+        self.compositor.add_layer("stars", self.render_stars, dynamic=True)
+        self.compositor.add_layer("ship", lambda canvas, box, state: blit(canvas.image, self.ship, self.ship_position))
+        self.compositor.add_layer("lights", lambda canvas, box, state: self.draw_lights(ImageDraw.Draw(canvas.image)))
+        self.compositor.add_layer("flames", lambda canvas, box, index: blit(canvas.image, self.flames[index], self.flame_position))
+        self.compositor.add_layer("hud", lambda canvas, box, state: blit(canvas.image, self.hud, (0, 0)))
+        self.compositor.add_layer("text", lambda canvas, box, state: self.draw_texts(ImageDraw.Draw(canvas.image)))
+        self.compositor.set_state("flames", 0)
+
+    def render_stars(self, canvas, box, state):
+        x0, y0, x1, y1 = box
+        self.starfield.draw(canvas.pixels[y0:y1, x0:x1], (x0, y0))
+
+    def draw_lights(self, draw):
+        for light in AMBIENT_LIGHTS:
+            draw_light(draw, light, True)
+
+    def draw_texts(self, draw):
+        for text, position, color in self.hud_texts:
+            text_cache.draw(draw, position, text, self.font, color)
+
+    def stages(self):
+        """Every stage by name, each a function doing one frame's worth of that work"""
+        canvas = Canvas(WIDTH, HEIGHT, (0, 0, 0, 255))
+        canvas_draw = ImageDraw.Draw(canvas.image)
+        tile = (96, 96, 160, 128)
+        wire = numpy.empty(2 * WIDTH * HEIGHT, numpy.uint8)
+
+        def flame():
+            index = random.randrange(len(self.flames))
+            blit(canvas.image, self.flames[index], self.flame_position)
+
+        def text_uncached():
+            for text, position, color in self.hud_texts:
+                canvas_draw.text(position, text, font=self.font, fill=color)
+
+        return {
+            "starfield_update": lambda: (self.starfield.step(1), self.starfield.interpolate(0.5)),
+            "starfield_draw": lambda: self.starfield.draw(canvas.pixels),
+            "ship_paste": lambda: blit(canvas.image, self.ship, self.ship_position),
+            "ambient_lights": lambda: self.draw_lights(canvas_draw),
+            "flame": flame,
+            "hud_overlay": lambda: blit(canvas.image, self.hud, (0, 0)),
+            "text": lambda: self.draw_texts(canvas_draw),
+            "text_uncached": text_uncached,
+            "status_bar": lambda: self.status_bar.draw(canvas_draw),
+            "event_card_draw": lambda: self.event_display.draw(canvas_draw),
+            "event_card_blit": lambda: canvas.image.paste(self.event_display.render()),
+            "rgb565_full": lambda: self.framebuffer.rgb565(out=wire),
+            "rgb565_tile": lambda: self.framebuffer.rgb565(tile, out=wire[:2 * 64 * 32]),
+            "push_full": lambda: self.framebuffer.push(self.display),
+            "push_tile": lambda: self.framebuffer.push(self.display, [tile]),
+            "frame_end_to_end": self.frame,
+        }
+
+    def frame(self):
+        """One game frame the way main.py draws it, sent synchronously"""
+        self.starfield.step(1)
+        self.starfield.interpolate(0.5)
+        self.damage.add_boxes(*self.starfield.damage_boxes())
+        self.compositor.set_state("flames", random.randrange(len(self.flames)))
+        if self.flame_box:
+            self.damage.add(self.flame_box)
+        regions = self.damage.regions()
+        for box in regions if regions is not None else [(0, 0, WIDTH, HEIGHT)]:
+            x0, y0, x1, y1 = box[0], box[1], box[2], min(box[3], self.playfield_height)
+            if y0 < y1:
+                self.framebuffer.clear((x0, y0, x1, y1))
+                self.compositor.compose(self.framebuffer, (x0, y0, x1, y1))
+        self.status_bar.draw(self.draw)
+        self.framebuffer.push(self.display, regions)
+        self.damage.clear()
+
+
+def machine_info():
+    """Describe the machine, including the Raspberry Pi model when there is one"""
+    info = {
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "pillow": PIL.__version__,
+    }
+    try:
+        with open("/proc/device-tree/model") as model:
+            info["model"] = model.read().strip("\0\n")
+    except OSError:
+        pass
+    return info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of a game frame")
+    parser.add_argument("--iterations", type=int, default=200, help="timed runs per stage")
+    parser.add_argument("--warmup", type=int, default=20, help="untimed runs before timing")
+    parser.add_argument("--seed", type=int, default=1, help="seed for stars, ship parts and events")
+    parser.add_argument("--stage", action="append", help="only run this stage, may be repeated")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    scene = Scene(args.seed)
+    stages = scene.stages()
+    unknown = set(args.stage or []) - set(stages)
+    if unknown:
+        parser.error(f"unknown stage: {', '.join(sorted(unknown))}; choose from {', '.join(stages)}")
+
+    results = {}
+    for name, stage in stages.items():
+        if args.stage and name not in args.stage:
+            continue
+        # Reseed per stage so a stage's inputs don't depend on which stages ran before it
+        random.seed(args.seed)
+        results[name] = summarize(measure(stage, args.iterations, args.warmup))
+        print(f"{name:<18} p50 {results[name]['p50_us']:>10.1f} us   p95 {results[name]['p95_us']:>10.1f} us")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "machine": machine_info(),
+        "stages": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
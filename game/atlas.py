@@ -0,0 +1,193 @@
+"""
+Packed sprite atlas with memory-mapped loading
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from PIL import Image
+
+SPRITE_DIR = "sprites"
+ATLAS_PATH = os.path.join(SPRITE_DIR, "sprites.atlas")
+
+# Magic, format version, index length; the pixel sheet follows the index
+MAGIC = b"SPAT"
+VERSION = 1
+HEADER = struct.Struct("<4sII")
+# Start of the pixel sheet is aligned so rows can be viewed without copying
+ALIGNMENT = 16
+
+
+def shelf_pack(sizes, sheet_width):
+    """
+    Place rectangles in rows of decreasing height
+
+    Args:
+        sizes: Dict of name to (width, height)
+        sheet_width: Width of the sheet, at least as wide as the widest rectangle
+
+    Returns:
+        tuple: (dict of name to (x, y, width, height), sheet height)
+    """
+    rects = {}
+    x = y = shelf_height = 0
+    for name, (width, height) in sorted(sizes.items(), key=lambda item: (-item[1][1], item[0])):
+        if x + width > sheet_width:
+            x, y = 0, y + shelf_height
+            shelf_height = 0
+        rects[name] = (x, y, width, height)
+        x += width
+        shelf_height = max(shelf_height, height)
+    return rects, y + shelf_height
+
+
+def pack_atlas(source_dir=SPRITE_DIR, path=ATLAS_PATH, sheet_width=640):
+    """
+    Pack every PNG in a directory into one RGBA atlas file
+
+    Args:
+        source_dir: Directory of sprites, named by file name without extension
+        path: Atlas file to write
+        sheet_width: Minimum width of the pixel sheet
+
+    Returns:
+        int: Number of sprites packed
+    """
+    images = {}
+    for filename in sorted(os.listdir(source_dir)):
+        name, extension = os.path.splitext(filename)
+        if extension.lower() == ".png":
+            images[name] = Image.open(os.path.join(source_dir, filename)).convert("RGBA")
+
+    sheet_width = max([sheet_width] + [image.width for image in images.values()])
+    rects, sheet_height = shelf_pack({name: image.size for name, image in images.items()}, sheet_width)
+    sheet = Image.new("RGBA", (sheet_width, max(sheet_height, 1)), (0, 0, 0, 0))
+    for name, (x, y, _, _) in rects.items():
+        sheet.paste(images[name], (x, y))
+
+    index = json.dumps({"size": sheet.size, "sprites": rects}, separators=(",", ":")).encode()
+    index += b" " * (-(HEADER.size + len(index)) % ALIGNMENT)
+
+    # Write next to the target and swap it in so a reader never sees half an atlas
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as atlas_file:
+        atlas_file.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        atlas_file.write(index)
+        atlas_file.write(sheet.tobytes())
+        # PIL wants a full stride for the last row of a view, even one at the sheet's edge
+        atlas_file.write(bytes(sheet.width * 4))
+    os.replace(temp_path, path)
+    return len(rects)
+
+
+class SpriteAtlas:
+    """Sprites served as read-only views into a memory-mapped atlas file"""
+
+    def __init__(self, path=ATLAS_PATH):
+        """
+        Open atlas
+
+        Args:
+            path: Atlas file written by pack_atlas
+        """
+        with open(path, "rb") as atlas_file:
+            self.map = mmap.mmap(atlas_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, index_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError(f"Not a version {VERSION} sprite atlas: {path}")
+
+        index = json.loads(self.map[HEADER.size:HEADER.size + index_length])
+        self.sheet_width, self.sheet_height = index["size"]
+        self.rects = {name: tuple(rect) for name, rect in index["sprites"].items()}
+        self.pixels = memoryview(self.map)[HEADER.size + index_length:]
+        self.views = {}
+
+    def __contains__(self, name):
+        return name in self.rects
+
+    def names(self):
+        return list(self.rects)
+
+    def get(self, name):
+        """
+        Get a sprite without copying or decoding it
+
+        Args:
+            name: Sprite file name without extension, e.g. "flame1"
+
+        Returns:
+            Image: Read-only RGBA image backed by the atlas; PIL copies it on the first write
+        """
+        view = self.views.get(name)
+        if view is None:
+            if name not in self.rects:
+                raise KeyError(f"Missing sprite: {name}")
+            x, y, width, height = self.rects[name]
+            stride = self.sheet_width * 4
+            start = y * stride + x * 4
+            rows = self.pixels[start:start + height * stride]
+            view = Image.frombuffer("RGBA", (width, height), rows, "raw", "RGBA", stride, 1)
+            self.views[name] = view
+        return view
+
+
+class SpriteDirectory:
+    """Fallback with the SpriteAtlas interface that decodes PNGs on demand"""
+
+    def __init__(self, source_dir=SPRITE_DIR):
+        self.source_dir = source_dir
+        self.rects = {
+            os.path.splitext(filename)[0]: None
+            for filename in os.listdir(source_dir)
+            if filename.lower().endswith(".png")
+        }
+
+    def __contains__(self, name):
+        return name in self.rects
+
+    def names(self):
+        return list(self.rects)
+
+    def get(self, name):
+        if name not in self.rects:
+            raise KeyError(f"Missing sprite: {name}")
+        return Image.open(os.path.join(self.source_dir, f"{name}.png")).convert("RGBA")
+
+
+def is_stale(path, source_dir):
+    """Check whether any PNG in source_dir is newer than the atlas, or the atlas is missing"""
+    if not os.path.exists(path):
+        return True
+    built = os.path.getmtime(path)
+    return any(
+        os.path.getmtime(os.path.join(source_dir, filename)) > built
+        for filename in os.listdir(source_dir)
+        if filename.lower().endswith(".png")
+    )
+
+
+def open_sprites(path=ATLAS_PATH, source_dir=SPRITE_DIR):
+    """
+    Open the sprite atlas, repacking it first if the PNGs changed
+
+    Falls back to loading the PNGs directly when the atlas can't be written or read,
+    e.g. on a read-only SD card.
+
+    Returns:
+        SpriteAtlas or SpriteDirectory
+    """
+    try:
+        if is_stale(path, source_dir):
+            pack_atlas(source_dir, path)
+        return SpriteAtlas(path)
+    except (OSError, ValueError) as e:
+        print(f"Sprite atlas unavailable, loading PNGs: {e}")
+        return SpriteDirectory(source_dir)
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else SPRITE_DIR
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.join(source, "sprites.atlas")
+    print(f"Packed {pack_atlas(source, target)} sprites into {target}")
@@ -0,0 +1,88 @@
+"""
+Pre-baked sprite animation clips
+"""
+import time
+from PIL import Image
+
+
+def silhouette(image, color=(255, 255, 255, 255)):
+    """Get a sprite filled with one colour, e.g. the white flash of the ship"""
+    overlay = Image.new("RGBA", image.size, color)
+    return Image.composite(overlay, image, image.getchannel("A"))
+
+
+class ClipFrame:
+    """One sprite of a clip, cropped to its opaque pixels"""
+
+    def __init__(self, image, position, duration):
+        """
+        Initialize clip frame
+
+        Args:
+            image: RGBA sprite, already cropped
+            position: Screen position of the cropped sprite
+            duration: Seconds the frame stays up
+        """
+        self.image = image
+        self.position = position
+        self.duration = duration
+        x, y = position
+        self.box = (x, y, x + image.width, y + image.height) if image else None
+
+
+class Clip:
+    """Sequence of sprites played over a fixed background, prepared before it is needed"""
+
+    def __init__(self):
+        self.frames = []
+
+    def add(self, image, position, duration):
+        """
+        Append a frame, cropping the sprite to its opaque box
+
+        Args:
+            image: RGBA sprite
+            position: Where the uncropped sprite would be pasted
+            duration: Seconds the frame stays up
+        """
+        bbox = image.getchannel("A").getbbox()
+        if bbox:
+            cropped = image.crop(bbox)
+            cropped.load()
+            frame = ClipFrame(cropped, (position[0] + bbox[0], position[1] + bbox[1]), duration)
+        else:
+            frame = ClipFrame(None, position, duration)
+        self.frames.append(frame)
+
+    def duration(self):
+        return sum(frame.duration for frame in self.frames)
+
+    def play(self, framebuffer, background, presenter, sleep=time.sleep):
+        """
+        Show every frame, restoring the background only where the previous sprite was
+
+        Args:
+            framebuffer: Framebuffer to draw into
+            background: Screen-sized Canvas the sprites are shown over
+            presenter: Presenter sending the frames to the panel
+            sleep: Function sleeping for a number of seconds
+        """
+        height, width = framebuffer.pixels.shape[:2]
+        framebuffer.pixels[:] = background.pixels
+        previous = None
+        for index, frame in enumerate(self.frames):
+            box = None
+            if frame.box:
+                x0, y0, x1, y1 = frame.box
+                box = (max(x0, 0), max(y0, 0), min(x1, width), min(y1, height))
+                if box[0] >= box[2] or box[1] >= box[3]:
+                    box = None
+            if previous:
+                x0, y0, x1, y1 = previous
+                framebuffer.pixels[y0:y1, x0:x1] = background.pixels[y0:y1, x0:x1]
+            if box:
+                framebuffer.image.paste(frame.image, frame.position, frame.image)
+            # The first frame replaces the whole screen, later ones only touch the sprite boxes
+            presenter.present(framebuffer, [b for b in (previous, box) if b] if index else None)
+            previous = box
+            sleep(frame.duration)
@@ -0,0 +1,203 @@
+"""
+Layered compositor with cached static layers
+"""
+from collections import OrderedDict
+import numpy
+from PIL import Image
+
+
+class Canvas:
+    """RGBA pixel array with a PIL image sharing its memory"""
+
+    def __init__(self, width, height, color=(0, 0, 0, 0)):
+        self.pixels = numpy.empty((height, width, 4), numpy.uint8)
+        self.pixels[:] = color
+        self.image = Image.frombuffer("RGBA", (width, height), self.pixels, "raw", "RGBA", 0, 1)
+        # Buffer-backed images start read-only and would copy themselves on the first write
+        self.image.readonly = 0
+
+
+def blit(image, sprite, position, clip=None):
+    """Alpha-composite sprite onto image at position, clipping at the edges or to a clip box"""
+    x, y = position
+    cx0, cy0, cx1, cy1 = clip or (0, 0, image.width, image.height)
+    x0, y0 = max(x, cx0, 0), max(y, cy0, 0)
+    x1 = min(x + sprite.width, cx1, image.width)
+    y1 = min(y + sprite.height, cy1, image.height)
+    if x0 >= x1 or y0 >= y1:
+        return
+    image.alpha_composite(sprite, (x0, y0), (x0 - x, y0 - y, x1 - x, y1 - y))
+
+
+class Layer:
+    """Named compositor layer"""
+
+    def __init__(self, name, render, dynamic=False, max_variants=8):
+        """
+        Initialize layer
+
+        Args:
+            name: Layer name used to address it in the compositor
+            render: Function (canvas, box, state) drawing the layer into a screen-sized
+                Canvas; dynamic layers only need to touch the (x0, y0, x1, y1) box
+            dynamic: Redraw every frame instead of caching the output
+            max_variants: Number of rendered states kept for a static layer
+        """
+        self.name = name
+        self.render = render
+        self.dynamic = dynamic
+        self.max_variants = max_variants
+        self.state = None
+        self.version = 0
+        self.variants = OrderedDict()
+
+    def key(self):
+        return (self.version, self.state)
+
+    def output(self, size):
+        """
+        Get the rendered layer for its current state, rendering it on a miss
+
+        Returns:
+            tuple: (image cropped to its opaque box, screen offset), or None if empty
+        """
+        if self.state in self.variants:
+            self.variants.move_to_end(self.state)
+            return self.variants[self.state]
+
+        canvas = Canvas(*size)
+        self.render(canvas, (0, 0) + size, self.state)
+        bbox = canvas.image.getchannel("A").getbbox()
+        output = (canvas.image.crop(bbox), bbox[:2]) if bbox else None
+
+        self.variants[self.state] = output
+        if len(self.variants) > self.max_variants:
+            self.variants.popitem(last=False)
+        return output
+
+    def invalidate(self):
+        """Drop every cached rendering of this layer"""
+        self.version += 1
+        self.variants.clear()
+
+
+class LayerCompositor:
+    """Composites named layers bottom to top, caching runs of static layers"""
+
+    def __init__(self, width, height, max_cached=24):
+        """
+        Initialize compositor
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            max_cached: Number of pre-blended static runs kept
+        """
+        self.size = (width, height)
+        self.max_cached = max_cached
+        self.layers = {}
+        self.segments = []
+        self.cache = OrderedDict()
+
+    def add_layer(self, name, render, dynamic=False, max_variants=8):
+        """Add a layer on top of the existing ones"""
+        layer = Layer(name, render, dynamic, max_variants)
+        self.layers[name] = layer
+        # Consecutive static layers share one pre-blended segment
+        if dynamic or not self.segments or self.segments[-1][0].dynamic:
+            self.segments.append([layer])
+        else:
+            self.segments[-1].append(layer)
+        return layer
+
+    def set_state(self, name, state):
+        """Select which variant of a layer is shown, e.g. the current flame frame"""
+        self.layers[name].state = state
+
+    def invalidate(self, name):
+        """Re-render a layer whose source changed, e.g. a new ship image"""
+        layer = self.layers[name]
+        layer.invalidate()
+        for key in [k for k in self.cache if layer in self.segments[k[0]]]:
+            del self.cache[key]
+
+    def _blend(self, index):
+        segment = self.segments[index]
+        key = (index,) + tuple(layer.key() for layer in segment)
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        canvas = Image.new("RGBA", self.size, (0, 0, 0, 0))
+        for layer in segment:
+            output = layer.output(self.size)
+            if output:
+                blit(canvas, *output)
+        bbox = canvas.getchannel("A").getbbox()
+        blended = (canvas.crop(bbox), bbox[:2]) if bbox else None
+
+        self.cache[key] = blended
+        if len(self.cache) > self.max_cached:
+            self.cache.popitem(last=False)
+        return blended
+
+    def compose(self, canvas, box=None):
+        """
+        Composite every layer into canvas
+
+        Args:
+            canvas: Screen-sized Canvas, usually the framebuffer
+            box: Optional (x0, y0, x1, y1) region to limit the work to
+        """
+        box = box or (0, 0) + self.size
+        for index, segment in enumerate(self.segments):
+            if segment[0].dynamic:
+                segment[0].render(canvas, box, segment[0].state)
+                continue
+            blended = self._blend(index)
+            if blended:
+                blit(canvas.image, *blended, clip=box)
+
+
+class ShipCompositor:
+    """Stacks ship parts, keeping the composite below each slot so a swap only re-blends upward"""
+
+    def __init__(self, size, slots):
+        """
+        Initialize ship compositor
+
+        Args:
+            size: (width, height) of the ship image
+            slots: List of (part name, paste position), bottom to top
+        """
+        self.size = size
+        self.slots = slots
+        self.index = {name: i for i, (name, _) in enumerate(slots)}
+        self.parts = {name: None for name, _ in slots}
+        # stack[i] is the ship with the parts of the first i slots pasted
+        self.stack = [Image.new("RGBA", size)]
+
+    def set_part(self, name, sprite):
+        """Put a sprite, or None to leave the slot empty, into a slot"""
+        self.parts[name] = sprite
+        del self.stack[self.index[name] + 1:]
+
+    def image(self):
+        """
+        Get the ship with every part pasted
+
+        Returns:
+            Image: Shared composite, copy it before drawing on it
+        """
+        while len(self.stack) <= len(self.slots):
+            name, position = self.slots[len(self.stack) - 1]
+            part = self.parts[name]
+            below = self.stack[-1]
+            if part is None:
+                # Empty slots share the image below instead of copying it
+                self.stack.append(below)
+                continue
+            ship = below.copy()
+            ship.paste(part, position, part)
+            self.stack.append(ship)
+        return self.stack[-1]
@@ -0,0 +1,170 @@
+"""
+Damage tracking for partial Display HAT Mini updates
+"""
+import math
+import numpy
+
+# Size of the grid cells damage is snapped to
+TILE_WIDTH = 32
+TILE_HEIGHT = 16
+
+
+class DamageTracker:
+    """Collects the screen regions that changed since the last push"""
+
+    def __init__(self, width, height, tile_width=TILE_WIDTH, tile_height=TILE_HEIGHT,
+                 max_regions=32, full_frame_ratio=0.75, gap_tiles=1):
+        """
+        Initialize damage tracker
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            tile_width: Width of the damage grid cells
+            tile_height: Height of the damage grid cells
+            max_regions: Above this many windows a full-frame push is used
+            full_frame_ratio: Above this share of the screen a full-frame push is used
+            gap_tiles: Clean tiles allowed between two dirty runs before they are split
+        """
+        self.width = width
+        self.height = height
+        self.tile_width = tile_width
+        self.tile_height = tile_height
+        self.max_regions = max_regions
+        self.full_frame_ratio = full_frame_ratio
+        self.gap_tiles = gap_tiles
+        self.columns = -(-width // tile_width)
+        self.dirty = set()
+        # Nothing has been pushed yet, so the first frame goes out whole
+        self.full = True
+
+    def add(self, box):
+        """Mark an (x0, y0, x1, y1) box as changed, x1/y1 exclusive"""
+        if self.full:
+            return
+        x0 = max(math.floor(box[0]), 0)
+        y0 = max(math.floor(box[1]), 0)
+        x1 = min(math.ceil(box[2]), self.width)
+        y1 = min(math.ceil(box[3]), self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        for row in range(y0 // self.tile_height, (y1 - 1) // self.tile_height + 1):
+            for col in range(x0 // self.tile_width, (x1 - 1) // self.tile_width + 1):
+                self.dirty.add((row, col))
+
+    def add_boxes(self, x0, y0, x1, y1):
+        """Mark many small boxes as changed at once, given as coordinate arrays"""
+        if self.full or not len(x0):
+            return
+        x0 = numpy.clip(x0, 0, self.width)
+        y0 = numpy.clip(y0, 0, self.height)
+        x1 = numpy.clip(x1, 0, self.width)
+        y1 = numpy.clip(y1, 0, self.height)
+        keep = (x0 < x1) & (y0 < y1)
+        if not keep.any():
+            return
+        row0 = y0[keep] // self.tile_height
+        row1 = (y1[keep] - 1) // self.tile_height
+        col0 = x0[keep] // self.tile_width
+        col1 = (x1[keep] - 1) // self.tile_width
+        # Walk the tile span of the widest box; boxes that are narrower repeat their last tile
+        tiles = []
+        for dr in range(int((row1 - row0).max()) + 1):
+            rows = numpy.minimum(row0 + dr, row1)
+            for dc in range(int((col1 - col0).max()) + 1):
+                tiles.append(rows * self.columns + numpy.minimum(col0 + dc, col1))
+        for tile in numpy.unique(numpy.concatenate(tiles)).tolist():
+            self.dirty.add(divmod(tile, self.columns))
+
+    def add_full(self):
+        """Mark the whole screen as changed"""
+        self.full = True
+
+    def regions(self):
+        """
+        Merge the damaged tiles into push windows
+
+        Returns:
+            list: (x0, y0, x1, y1) boxes to push, or None for a full-frame push
+        """
+        if self.full:
+            return None
+        if not self.dirty:
+            return []
+
+        # Join dirty tiles into horizontal runs per tile row
+        rows = {}
+        for row, col in self.dirty:
+            rows.setdefault(row, []).append(col)
+        runs = []
+        for row in sorted(rows):
+            cols = sorted(rows[row])
+            start = end = cols[0]
+            for col in cols[1:]:
+                if col - end > self.gap_tiles + 1:
+                    runs.append((row, start, end))
+                    start = col
+                end = col
+            runs.append((row, start, end))
+
+        # Stack runs with the same column span in consecutive rows
+        spans = {}
+        merged = []
+        for row, start, end in runs:
+            open_region = spans.get((start, end))
+            if open_region and open_region[1] == row - 1:
+                open_region[1] = row
+            else:
+                open_region = [row, row, start, end]
+                spans[(start, end)] = open_region
+                merged.append(open_region)
+
+        if len(merged) > self.max_regions:
+            return None
+
+        boxes = []
+        area = 0
+        for row0, row1, col0, col1 in merged:
+            box = (
+                col0 * self.tile_width,
+                row0 * self.tile_height,
+                min((col1 + 1) * self.tile_width, self.width),
+                min((row1 + 1) * self.tile_height, self.height),
+            )
+            area += (box[2] - box[0]) * (box[3] - box[1])
+            boxes.append(box)
+
+        if area > self.full_frame_ratio * self.width * self.height:
+            return None
+        return boxes
+
+    def clear(self):
+        """Forget all damage after a push"""
+        self.dirty.clear()
+        self.full = False
+
+
+def sprite_box(images, x, y):
+    """
+    Get the screen box covered by the opaque pixels of sprites pasted at (x, y)
+
+    Args:
+        images: RGBA image or list of frames that share the same paste position
+        x: Paste x position
+        y: Paste y position
+
+    Returns:
+        tuple: (x0, y0, x1, y1) box, or None if every frame is fully transparent
+    """
+    if not isinstance(images, (list, tuple)):
+        images = [images]
+    boxes = [image.getchannel("A").getbbox() for image in images]
+    boxes = [b for b in boxes if b]
+    if not boxes:
+        return None
+    return (
+        x + min(b[0] for b in boxes),
+        y + min(b[1] for b in boxes),
+        x + max(b[2] for b in boxes),
+        y + max(b[3] for b in boxes),
+    )
@@ -0,0 +1,288 @@
+"""
+Display backends: the Display HAT Mini and a headless stand-in
+"""
+import os
+import time
+import numpy
+from numpy.lib import format as npy_format
+from PIL import Image
+
+
+class DisplayBackend:
+    """What the game needs from a display: a panel taking RGB565 windows, and buttons"""
+
+    # Button pins, the same numbers displayhatmini uses
+    BUTTON_A = 5
+    BUTTON_B = 6
+    BUTTON_X = 16
+    BUTTON_Y = 24
+
+    def set_window(self, x0=0, y0=0, x1=None, y1=None):
+        """Select the inclusive panel rectangle the next data fills, the whole panel by default"""
+        raise NotImplementedError
+
+    def data(self, data):
+        """Send big-endian RGB565 pixels for the current window"""
+        raise NotImplementedError
+
+    def end_frame(self):
+        """Called once every window of a frame has been sent"""
+
+    def read_button(self, button):
+        """Check whether a button is held down"""
+        return False
+
+    def on_button_pressed(self, callback):
+        """
+        Call callback(button) from another thread whenever a button goes down or up
+
+        Returns:
+            bool: False if the backend has no edge interrupts and buttons must be polled
+        """
+        return False
+
+    def close(self):
+        """Release the display"""
+
+
+class HatBackend(DisplayBackend):
+    """Pimoroni Display HAT Mini"""
+
+    def __init__(self, buffer):
+        """
+        Initialize the HAT
+
+        Args:
+            buffer: PIL image the driver is bound to
+        """
+        import displayhatmini
+        self.hat = displayhatmini.DisplayHATMini(buffer)
+        self.st7789 = self.hat.st7789
+
+    def set_window(self, x0=0, y0=0, x1=None, y1=None):
+        self.st7789.set_window(x0, y0, x1, y1)
+
+    def data(self, data):
+        self.st7789.data(data)
+
+    def read_button(self, button):
+        return self.hat.read_button(button)
+
+    def on_button_pressed(self, callback):
+        # Edge detection on both edges, RPi.GPIO calls back from its own thread
+        self.hat.on_button_pressed(callback)
+        return True
+
+
+class ButtonScript:
+    """Scripted button presses for the headless backend"""
+
+    NAMES = {"A": DisplayBackend.BUTTON_A, "B": DisplayBackend.BUTTON_B,
+             "X": DisplayBackend.BUTTON_X, "Y": DisplayBackend.BUTTON_Y}
+
+    def __init__(self, presses=None, clock=time.time):
+        """
+        Initialize button script
+
+        Args:
+            presses: List of (seconds after start, button, seconds held)
+            clock: Clock returning seconds
+        """
+        self.presses = presses or []
+        self.clock = clock
+        self.start = clock()
+
+    @classmethod
+    def parse(cls, script, clock=time.time):
+        """
+        Build a script from text such as "5:A,12.5:Y:0.3"
+
+        Each comma separated entry is start second, button name and an optional hold
+        time that defaults to 0.1 seconds.
+        """
+        presses = []
+        for entry in filter(None, (part.strip() for part in script.split(","))):
+            fields = entry.split(":")
+            hold = float(fields[2]) if len(fields) > 2 else 0.1
+            presses.append((float(fields[0]), cls.NAMES[fields[1].upper()], hold))
+        return cls(presses, clock)
+
+    def is_pressed(self, button):
+        elapsed = self.clock() - self.start
+        return any(
+            pressed == button and start <= elapsed < start + hold
+            for start, pressed, hold in self.presses
+        )
+
+
+class FrameDump:
+    """Writes upright RGB frames to a .npy array, a .rgb raw video or a directory of PNGs"""
+
+    def __init__(self, path, every=1):
+        """
+        Initialize frame dump
+
+        Args:
+            path: Output path; its extension picks the format, anything else is a PNG directory
+            every: Keep one frame in this many
+        """
+        self.path = path
+        self.every = every
+        self.count = 0
+        self.kept = 0
+        self.kind = os.path.splitext(path)[1].lower()
+        self.file = None
+        # Shape and type of one frame, taken from the first one kept, for the .npy header
+        self.frame_shape = None
+        self.dtype = None
+        if self.kind in (".rgb", ".raw"):
+            # Play back with: ffplay -f rawvideo -pixel_format rgb24 -video_size 320x240 <path>
+            self.file = open(path, "wb")
+        elif self.kind != ".npy":
+            os.makedirs(path, exist_ok=True)
+
+    def write(self, frame):
+        index = self.count
+        self.count += 1
+        if index % self.every:
+            return
+        if self.kind == ".npy" and self.file is None:
+            # Frames go straight to disk behind a header whose frame count is filled in on close
+            self.frame_shape = frame.shape
+            self.dtype = frame.dtype
+            self.file = open(self.path, "wb")
+            self._write_npy_header()
+        if self.file:
+            self.file.write(numpy.ascontiguousarray(frame).tobytes())
+        else:
+            Image.fromarray(frame).save(os.path.join(self.path, f"frame_{index:06d}.png"))
+        self.kept += 1
+
+    def _write_npy_header(self):
+        # The header is padded to a fixed size, so rewriting it with a larger count never moves the data
+        self.file.seek(0)
+        npy_format.write_array_header_1_0(self.file, {
+            "descr": npy_format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.kept,) + self.frame_shape,
+        })
+        self.file.seek(0, os.SEEK_END)
+
+    def close(self):
+        if self.file:
+            if self.kind == ".npy":
+                self._write_npy_header()
+            self.file.close()
+
+
+class HeadlessBackend(DisplayBackend):
+    """Keeps the panel contents in memory so the game runs and can be profiled without a HAT"""
+
+    def __init__(self, width, height, rotation=180, buttons=None, dump=None):
+        """
+        Initialize headless backend
+
+        Args:
+            width: Panel width in pixels
+            height: Panel height in pixels
+            rotation: Rotation the framebuffer applies, undone when frames are read back
+            buttons: Optional ButtonScript
+            dump: Optional FrameDump receiving every finished frame
+        """
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+        self.buttons = buttons
+        self.dump = dump
+        self.panel = numpy.zeros((height, width), numpy.uint16)
+        self.window = (0, 0, width - 1, height - 1)
+        self.staging = None
+        self.cursor = 0
+
+        self.frames = 0
+        self.windows = 0
+        self.pixels = 0
+
+    def set_window(self, x0=0, y0=0, x1=None, y1=None):
+        x1 = self.width - 1 if x1 is None else x1
+        y1 = self.height - 1 if y1 is None else y1
+        self.window = (x0, y0, x1, y1)
+        self.staging = numpy.empty((y1 - y0 + 1) * (x1 - x0 + 1), numpy.uint16)
+        self.cursor = 0
+        self.windows += 1
+
+    def data(self, data):
+        if self.staging is None:
+            self.set_window()
+        pixels = numpy.frombuffer(data, ">u2")
+        count = min(len(pixels), len(self.staging) - self.cursor)
+        self.staging[self.cursor:self.cursor + count] = pixels[:count]
+        self.cursor += count
+        self.pixels += count
+        if self.cursor == len(self.staging):
+            x0, y0, x1, y1 = self.window
+            self.panel[y0:y1 + 1, x0:x1 + 1] = self.staging.reshape(y1 - y0 + 1, x1 - x0 + 1)
+            self.cursor = 0
+
+    def end_frame(self):
+        self.frames += 1
+        if self.dump:
+            self.dump.write(self.frame())
+
+    def frame(self):
+        """
+        Get what the panel shows, the way up a player would see it
+
+        Returns:
+            numpy.ndarray: (height, width, 3) uint8 RGB array
+        """
+        panel = self.panel
+        if self.rotation == 180:
+            panel = panel[::-1, ::-1]
+        rgb = numpy.empty(panel.shape + (3,), numpy.uint8)
+        red = (panel >> 11) & 0x1F
+        green = (panel >> 5) & 0x3F
+        blue = panel & 0x1F
+        # Repeat the top bits into the low ones so full intensity maps back to 255
+        rgb[..., 0] = (red << 3) | (red >> 2)
+        rgb[..., 1] = (green << 2) | (green >> 4)
+        rgb[..., 2] = (blue << 3) | (blue >> 2)
+        return rgb
+
+    def read_button(self, button):
+        return bool(self.buttons and self.buttons.is_pressed(button))
+
+    def close(self):
+        if self.dump:
+            self.dump.close()
+
+
+def open_display(buffer, width, height):
+    """
+    Open the display selected by the environment
+
+    SPACEPILOT_DISPLAY picks "hat" or "headless"; without it the HAT is used when its
+    driver is installed. Headless runs read SPACEPILOT_BUTTONS (see ButtonScript.parse),
+    SPACEPILOT_DUMP (see FrameDump) and SPACEPILOT_DUMP_EVERY, the frame sampling interval.
+
+    Args:
+        buffer: PIL image the HAT driver is bound to
+        width: Screen width in pixels
+        height: Screen height in pixels
+
+    Returns:
+        DisplayBackend
+    """
+    kind = os.environ.get("SPACEPILOT_DISPLAY", "")
+    if kind != "headless":
+        try:
+            return HatBackend(buffer)
+        except ImportError as e:
+            if kind == "hat":
+                raise
+            print(f"Display HAT Mini unavailable, running headless: {e}")
+
+    buttons = ButtonScript.parse(os.environ.get("SPACEPILOT_BUTTONS", ""))
+    dump_path = os.environ.get("SPACEPILOT_DUMP")
+    dump = FrameDump(dump_path, int(os.environ.get("SPACEPILOT_DUMP_EVERY", 1))) if dump_path else None
+    return HeadlessBackend(width, height, buttons=buttons, dump=dump)
@@ -1,7 +1,6 @@
 """
 Display configuration for different screen types
 """
-import pygame
 import os
 import platform
 
@@ -0,0 +1,97 @@
+"""
+Process-wide font registry with cached glyph metrics
+"""
+from collections import OrderedDict
+from PIL import ImageFont
+
+DEJAVU_SANS_BOLD = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+
+class FontMetrics:
+    """Measurements of one font, computed once per glyph or string"""
+
+    def __init__(self, font, max_strings=512):
+        """
+        Initialize font metrics
+
+        Args:
+            font: PIL font object
+            max_strings: Number of measured strings kept
+        """
+        self.font = font
+        self.max_strings = max_strings
+        self.advances = {}
+        self.lengths = OrderedDict()
+        if hasattr(font, "getmetrics"):
+            self.ascent, self.descent = font.getmetrics()
+        else:
+            # Bitmap fonts have no metrics table, measure a tall and a descending glyph instead
+            self.ascent, self.descent = font.getbbox("Ag")[3], 0
+        self.line_height = self.ascent + self.descent
+
+    def advance(self, char):
+        """Horizontal advance of a single glyph"""
+        width = self.advances.get(char)
+        if width is None:
+            width = self.advances[char] = self.font.getlength(char)
+        return width
+
+    def textlength(self, text):
+        """Same as ImageDraw.textlength for this font, measured once per string"""
+        length = self.lengths.get(text)
+        if length is None:
+            length = self.font.getlength(text)
+            self.lengths[text] = length
+            if len(self.lengths) > self.max_strings:
+                self.lengths.popitem(last=False)
+        else:
+            self.lengths.move_to_end(text)
+        return length
+
+
+class FontRegistry:
+    """Loads each font face and size once and shares it"""
+
+    def __init__(self):
+        self.fonts = {}
+        self.font_metrics = {}
+
+    def get(self, face=None, size=None):
+        """
+        Get a font, loading it on first use
+
+        Args:
+            face: Path of a TrueType file, or None for PIL's default font
+            size: Point size for TrueType faces
+
+        Returns:
+            PIL font object; the default font if the face can't be loaded
+        """
+        key = (face, size)
+        font = self.fonts.get(key)
+        if font is None:
+            if face is None:
+                font = ImageFont.load_default()
+            else:
+                try:
+                    font = ImageFont.truetype(face, size)
+                except OSError as e:
+                    print(f"Font {face} unavailable, using the default font: {e}")
+                    font = self.get()
+            self.fonts[key] = font
+        return font
+
+    def preload(self, specs):
+        """Load several (face, size) fonts up front, e.g. during the logo splash"""
+        for face, size in specs:
+            self.metrics(self.get(face, size))
+
+    def metrics(self, font):
+        """Get the shared FontMetrics of a font"""
+        metrics = self.font_metrics.get(font)
+        if metrics is None:
+            metrics = self.font_metrics[font] = FontMetrics(font)
+        return metrics
+
+
+fonts = FontRegistry()
@@ -0,0 +1,91 @@
+"""
+Persistent framebuffer with a native RGB565 output path
+"""
+import numpy
+from game.compositor import Canvas
+
+
+class Framebuffer(Canvas):
+    """Screen buffer that composition writes into and the panel reads RGB565 from"""
+
+    def __init__(self, width, height, rotation=180):
+        """
+        Initialize framebuffer
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            rotation: Rotation the panel is driven at (DisplayHATMini uses 180)
+        """
+        if rotation not in (0, 180):
+            raise ValueError(f"Unsupported rotation {rotation}")
+        super().__init__(width, height, (0, 0, 0, 255))
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+
+        # Scratch space for the conversion, reused every frame
+        self._high = numpy.empty((height, width), numpy.uint16)
+        self._low = numpy.empty((height, width), numpy.uint16)
+        # The panel takes big-endian pixels, so the last step writes wire format directly
+        self._wire_bytes = numpy.empty(2 * width * height, numpy.uint8)
+
+    def clear(self, box=None, color=(0, 0, 0, 255)):
+        """Fill box (default the whole screen) with a solid colour"""
+        x0, y0, x1, y1 = box or (0, 0, self.width, self.height)
+        self.pixels[y0:y1, x0:x1] = color
+
+    def panel_window(self, box):
+        """Map a screen box to the inclusive (x0, y0, x1, y1) panel address window"""
+        x0, y0, x1, y1 = box
+        if self.rotation == 180:
+            return (self.width - x1, self.height - y1, self.width - x0 - 1, self.height - y0 - 1)
+        return (x0, y0, x1 - 1, y1 - 1)
+
+    def rgb565(self, box=None, out=None):
+        """
+        Convert a region to RGB565 in panel orientation and byte order
+
+        Args:
+            box: Optional (x0, y0, x1, y1) screen box, defaults to the whole screen
+            out: Optional uint8 array to write into, at least two bytes per pixel
+
+        Returns:
+            memoryview: Pixel bytes, valid until the next conversion into the same buffer
+        """
+        x0, y0, x1, y1 = box or (0, 0, self.width, self.height)
+        width, height = x1 - x0, y1 - y0
+        source = self.pixels[y0:y1, x0:x1]
+        if self.rotation == 180:
+            source = source[::-1, ::-1]
+
+        out = self._wire_bytes if out is None else out
+        out = out[:2 * width * height]
+        high = self._high[:height, :width]
+        low = self._low[:height, :width]
+        wire = out.view(">u2").reshape(height, width)
+        numpy.bitwise_and(source[..., 0], 0xF8, out=high)
+        numpy.left_shift(high, 8, out=high)
+        numpy.bitwise_and(source[..., 1], 0xFC, out=low)
+        numpy.left_shift(low, 3, out=low)
+        numpy.bitwise_or(high, low, out=high)
+        numpy.right_shift(source[..., 2], 3, out=low)
+        numpy.bitwise_or(high, low, out=wire)
+        return memoryview(out)
+
+    def push(self, display, regions=None):
+        """
+        Send the framebuffer to the display
+
+        Args:
+            display: DisplayBackend the frame goes to
+            regions: Optional list of (x0, y0, x1, y1) boxes to send instead of the whole screen
+        """
+        if regions is None:
+            display.set_window()
+            display.data(self.rgb565())
+        else:
+            for box in regions:
+                display.set_window(*self.panel_window(box))
+                display.data(self.rgb565(box))
+        display.end_frame()
@@ -0,0 +1,143 @@
+"""
+Edge-driven button input queue
+"""
+from collections import deque
+import threading
+import time
+
+PRESS = "press"
+RELEASE = "release"
+HOLD = "hold"
+REPEAT = "repeat"
+
+
+class ButtonEvent:
+    """A button changing state, or still being held"""
+
+    def __init__(self, button, kind, timestamp):
+        """
+        Initialize button event
+
+        Args:
+            button: Button pin, e.g. DisplayBackend.BUTTON_A
+            kind: PRESS, RELEASE, HOLD or REPEAT
+            timestamp: Clock time the event happened at
+        """
+        self.button = button
+        self.kind = kind
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"ButtonEvent({self.button}, {self.kind!r}, {self.timestamp:.3f})"
+
+
+class InputQueue:
+    """Collects debounced button events from edge interrupts for the main loop to drain"""
+
+    def __init__(self, display, buttons=None, debounce=0.02, hold_time=0.6, repeat_interval=0.2,
+                 poll_interval=0.02, clock=time.monotonic):
+        """
+        Initialize input queue and subscribe to button edges
+
+        Args:
+            display: DisplayBackend the buttons belong to
+            buttons: Button pins to watch, all four by default
+            debounce: Seconds after an accepted edge during which new edges are ignored
+            hold_time: Seconds a button is down before a HOLD event
+            repeat_interval: Seconds between REPEAT events after HOLD
+            poll_interval: Seconds between polls while polling is needed, see next_poll()
+            clock: Clock returning seconds
+        """
+        self.display = display
+        self.buttons = buttons or [display.BUTTON_A, display.BUTTON_B, display.BUTTON_X, display.BUTTON_Y]
+        self.debounce = debounce
+        self.hold_time = hold_time
+        self.repeat_interval = repeat_interval
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.listeners = []
+
+        self.lock = threading.Lock()
+        self.events = deque()
+        self.pressed = {button: False for button in self.buttons}
+        self.changed = {button: float("-inf") for button in self.buttons}
+        # Button to (due time, HOLD or REPEAT) while it is down
+        self.repeats = {}
+
+        # Without edge interrupts, poll() samples the buttons itself
+        self.interrupts = display.on_button_pressed(self._on_edge)
+
+    def _on_edge(self, button):
+        # Runs on the GPIO callback thread
+        if button in self.pressed:
+            self._update(button, self.display.read_button(button), self.clock())
+
+    def _update(self, button, pressed, now):
+        with self.lock:
+            if pressed == self.pressed[button] or now - self.changed[button] < self.debounce:
+                return
+            self.pressed[button] = pressed
+            self.changed[button] = now
+            self.events.append(ButtonEvent(button, PRESS if pressed else RELEASE, now))
+            if pressed:
+                self.repeats[button] = (now + self.hold_time, HOLD)
+            else:
+                self.repeats.pop(button, None)
+        for listener in self.listeners:
+            listener()
+
+    def add_listener(self, listener):
+        """
+        Call listener() whenever a press or release is queued
+
+        It can be called from the GPIO thread, so it should only hand over to
+        the thread that drains the queue, e.g. with loop.call_soon_threadsafe.
+        """
+        self.listeners.append(listener)
+
+    def next_poll(self):
+        """
+        Seconds until poll() should be called again even without a listener call
+
+        Returns:
+            float: poll_interval while buttons must be sampled or are held, None when only an edge brings news
+        """
+        if not self.interrupts or any(self.pressed.values()):
+            return self.poll_interval
+        return None
+
+    def poll(self):
+        """
+        Take every event queued since the last call, without blocking
+
+        Returns:
+            list: ButtonEvent, oldest first
+        """
+        now = self.clock()
+        for button in self.buttons:
+            # Held buttons are checked too, a release can be lost among bounce edges
+            if not self.interrupts or self.pressed[button]:
+                self._update(button, self.display.read_button(button), now)
+
+        with self.lock:
+            for button, (due, kind) in list(self.repeats.items()):
+                if now >= due:
+                    self.events.append(ButtonEvent(button, kind, due))
+                    # After a long stall, carry on from now instead of sending a burst
+                    next_due = due + self.repeat_interval
+                    self.repeats[button] = (next_due if next_due > now else now + self.repeat_interval, REPEAT)
+            events = list(self.events)
+            self.events.clear()
+        return events
+
+    def presses(self):
+        """Buttons pressed since the last call, oldest first"""
+        return [event.button for event in self.poll() if event.kind == PRESS]
+
+    def is_pressed(self, button):
+        return self.pressed[button]
+
+    def clear(self):
+        """Drop queued events, e.g. presses made while a blocking animation played"""
+        with self.lock:
+            self.events.clear()
@@ -0,0 +1,144 @@
+"""
+Lightweight frame instrumentation
+"""
+import json
+import time
+import numpy
+
+
+class NullSpan:
+    """Span used while instrumentation is off, entering and leaving it does nothing"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """Times one stage and adds it to its instrumentation totals"""
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = self.stats.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(self.name, self.stats.clock() - self.start)
+        return False
+
+
+class Instrumentation:
+    """Named timing spans, counters and a ring buffer of recent frame times"""
+
+    def __init__(self, capacity=256, frame_budget=1.0 / 30, enabled=False, clock=time.perf_counter):
+        """
+        Initialize instrumentation
+
+        Args:
+            capacity: Number of recent frames kept for percentiles
+            frame_budget: Seconds a frame may take before it counts as dropped
+            enabled: Start collecting straight away
+            clock: Clock returning seconds
+        """
+        self.capacity = capacity
+        self.frame_budget = frame_budget
+        self.enabled = enabled
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Forget everything collected so far"""
+        # Work time and start-to-start interval of the last frames, written round-robin
+        self.work = numpy.zeros(self.capacity)
+        self.intervals = numpy.zeros(self.capacity)
+        self.frames = 0
+        self.dropped = 0
+        self.counters = {}
+        self.spans = {}
+        self.frame_start = None
+        self.last_start = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if self.enabled:
+            self.reset()
+
+    def span(self, name):
+        """Get a context manager timing a stage, e.g. with stats.span("compose"):"""
+        return Span(self, name) if self.enabled else NULL_SPAN
+
+    def record(self, name, seconds):
+        totals = self.spans.get(name)
+        if totals is None:
+            totals = self.spans[name] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] = max(totals[2], seconds)
+
+    def count(self, name, amount=1):
+        """Add to a named counter"""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = self.clock()
+        if self.last_start is not None:
+            self.intervals[self.frames % self.capacity] = now - self.last_start
+        self.last_start = self.frame_start = now
+
+    def end_frame(self):
+        """Close the frame started by begin_frame, before any sleep for frame pacing"""
+        if not self.enabled or self.frame_start is None:
+            return
+        work = self.clock() - self.frame_start
+        self.work[self.frames % self.capacity] = work
+        self.frames += 1
+        if work > self.frame_budget:
+            self.dropped += 1
+        self.frame_start = None
+
+    def fps(self):
+        """Frames per second over the frames in the ring buffer"""
+        intervals = self.intervals[:min(self.frames, self.capacity)]
+        intervals = intervals[intervals > 0]
+        return len(intervals) / intervals.sum() if len(intervals) else 0.0
+
+    def percentile(self, percent):
+        """Frame work time percentile in milliseconds over the frames in the ring buffer"""
+        kept = min(self.frames, self.capacity)
+        return float(numpy.percentile(self.work[:kept], percent)) * 1000 if kept else 0.0
+
+    def overlay_text(self):
+        """Compact summary for the status bar, e.g. "30fps 12.1ms 2d" """
+        return f"{self.fps():.0f}fps {self.percentile(95):.1f}ms {self.dropped}d"
+
+    def summary(self):
+        """Everything collected, in a JSON-friendly form"""
+        return {
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "frame_budget_ms": self.frame_budget * 1000,
+            "fps": round(self.fps(), 2),
+            "frame_ms": {f"p{p}": round(self.percentile(p), 3) for p in (50, 95, 99)},
+            "spans": {
+                name: {"count": count, "mean_ms": round(total / count * 1000, 3), "max_ms": round(worst * 1000, 3)}
+                for name, (count, total, worst) in self.spans.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def dump(self, path, summary=None):
+        """Write summary(), or a summary taken earlier, to a JSON file"""
+        with open(path, "w") as output:
+            json.dump(summary or self.summary(), output, indent=2)
@@ -0,0 +1,89 @@
+"""
+Offline progress catch-up
+
+An idle run keeps going while the device is powered off or asleep. Instead of
+replaying the missed frames, the time is credited in one closed-form step.
+"""
+import math
+import time
+
+# Most time away credited on resume. A Pi has no real-time clock, so the wall
+# clock can step forward by hours after boot when NTP syncs or fake-hwclock
+# restores; no gap measured on it is trusted beyond this.
+MAX_AWAY_SECONDS = 12 * 3600.0
+
+
+class OfflineProgress:
+    """What a stretch of time with nothing running adds up to"""
+
+    def __init__(self, seconds, boosted_seconds, boost_left, distance, dark_matter, expected_events):
+        self.seconds = seconds
+        self.boosted_seconds = boosted_seconds
+        # Boost seconds still to run at the end of the stretch, 0 once it has expired
+        self.boost_left = boost_left
+        self.distance = distance
+        self.dark_matter = dark_matter
+        self.expected_events = expected_events
+
+    @property
+    def event_chance(self):
+        """Probability that at least one event came up; its card then waits for the player"""
+        return 1.0 - math.exp(-self.expected_events)
+
+
+def suspended_time():
+    """
+    Seconds the system has spent suspended since boot
+
+    CLOCK_BOOTTIME counts suspend and CLOCK_MONOTONIC does not, and neither
+    jumps when the wall clock is set, so differences of this are real time asleep.
+    Always 0 where CLOCK_BOOTTIME is unavailable.
+    """
+    try:
+        return max(0.0, time.clock_gettime(time.CLOCK_BOOTTIME) - time.monotonic())
+    except (AttributeError, OSError):
+        return 0.0
+
+
+def time_away(saved_at, now=None):
+    """
+    Seconds between a save's wall-clock timestamp and now, for crediting time powered off
+
+    Negative gaps, from a clock set back, count as none, and gaps are capped
+    at MAX_AWAY_SECONDS.
+    """
+    if now is None:
+        now = time.time()
+    return min(max(0.0, now - saved_at), MAX_AWAY_SECONDS)
+
+
+def offline_progress(seconds, distance_rate, boost_left=0.0, boost_multiplier=1.0,
+                     dark_matter=0.0, dark_matter_rate=0.0, storage_capacity=math.inf,
+                     event_interval=None):
+    """
+    Work out the progress made over seconds of wall time without simulating it
+
+    The cost is the same for a second as for a week.
+
+    Args:
+        seconds: Length of the stretch
+        distance_rate: Distance per second at normal speed
+        boost_left: Boost seconds remaining at the start of the stretch
+        boost_multiplier: Speed multiplier while boosted
+        dark_matter: Dark matter held at the start of the stretch
+        dark_matter_rate: Dark matter collected per second
+        storage_capacity: Most dark matter the ship can hold
+        event_interval: Mean seconds between random events, which only come
+            while not boosted; None when events are scheduled some other way
+
+    Returns:
+        OfflineProgress: Distance gained, dark matter held at the end and event odds
+    """
+    seconds = max(0.0, seconds)
+    boosted = min(seconds, max(0.0, boost_left))
+    unboosted = seconds - boosted
+    distance = distance_rate * (boosted * boost_multiplier + unboosted)
+    dark_matter = min(dark_matter + dark_matter_rate * seconds, storage_capacity)
+    expected_events = unboosted / event_interval if event_interval else 0.0
+    return OfflineProgress(seconds, boosted, max(0.0, boost_left - seconds), distance, dark_matter,
+                           expected_events)
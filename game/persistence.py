@@ -0,0 +1,193 @@
+"""
+Write-behind game state persistence
+"""
+import json
+import os
+import threading
+import time
+
+
+def _encode(value):
+    # Objects kept in the state, e.g. resolved events, are saved as their attributes
+    return {name: _records(attribute) for name, attribute in vars(value).items()}
+
+
+def _records(value):
+    # JSON would write named tuples, e.g. event options, as bare lists; keep their field names
+    if hasattr(value, "_asdict"):
+        return value._asdict()
+    if isinstance(value, (list, tuple)):
+        return [_records(item) for item in value]
+    return value
+
+
+def write_atomic(path, data):
+    """
+    Replace a file so that after a power cut it holds either the old or the new data
+
+    Args:
+        path: File to write
+        data: Bytes to write
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as output:
+        output.write(data)
+        output.flush()
+        os.fsync(output.fileno())
+    os.replace(temp_path, path)
+    # Make the rename itself durable
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+class StateStore:
+    """Saves game state as JSON from a background thread, coalescing changes between writes"""
+
+    def __init__(self, path, snapshot, min_interval=2.0, max_interval=60.0, clock=time.monotonic):
+        """
+        Initialize state store and start its writer thread
+
+        The game marks changes with mark_dirty() and calls maybe_save() often. A
+        save is due once max_interval / (1 + dirty) seconds have passed since the
+        last one, so a burst of changes is written within min_interval while slow
+        idle progress waits up to max_interval. Nothing is written while clean.
+
+        Args:
+            path: JSON file the state lives in
+            snapshot: Function returning the state to save, called on the caller's thread
+            min_interval: Fewest seconds between saves
+            max_interval: Most seconds changes wait before being saved
+            clock: Clock returning seconds
+        """
+        self.path = path
+        self.snapshot = snapshot
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+
+        self.dirty = 0.0
+        self.last_save = clock()
+        self.pending = None
+        self.writing = False
+        self.running = True
+        # Last write failure; saving carries on and the next snapshot tries again
+        self.error = None
+        self.condition = threading.Condition()
+
+        # Counters for checking how much the card is written
+        self.saves = 0
+        self.writes = 0
+        self.bytes_written = 0
+
+        self.thread = threading.Thread(target=self._run, name="state-store", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        """
+        Read the saved state
+
+        Returns:
+            dict: The saved state, or None when there is none or it cannot be read
+        """
+        try:
+            with open(self.path) as saved:
+                return json.load(saved)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error loading game state: {e}")
+            return None
+
+    def mark_dirty(self, weight=1.0):
+        """
+        Record a change to the state
+
+        Args:
+            weight: How much the change matters, e.g. 1 for a button press and a fraction for a tick of progress
+        """
+        self.dirty += weight
+
+    def due(self):
+        """Check whether the changes so far should be saved now"""
+        if not self.dirty:
+            return False
+        elapsed = self.clock() - self.last_save
+        return elapsed >= self.min_interval and elapsed >= self.max_interval / (1 + self.dirty)
+
+    def maybe_save(self):
+        """Save if due(); cheap enough to call every frame"""
+        if self.due():
+            self.save()
+
+    def save(self):
+        """Snapshot the state now and queue it for writing, without waiting for the write"""
+        data = json.dumps(self.snapshot(), default=_encode).encode()
+        self.dirty = 0.0
+        self.last_save = self.clock()
+        self.saves += 1
+        with self.condition:
+            # A snapshot still waiting is stale now, only the newest one gets written
+            self.pending = data
+            self.condition.notify_all()
+
+    def clear(self):
+        """Forget unsaved changes and delete the saved state"""
+        with self.condition:
+            self.pending = None
+            while self.writing:
+                self.condition.wait()
+            self.dirty = 0.0
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def flush(self):
+        """Block until every queued snapshot is on disk"""
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+
+    def close(self):
+        """Write what is queued and stop the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.running and self.pending is None:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                data = self.pending
+                self.pending = None
+                self.writing = True
+
+            try:
+                write_atomic(self.path, data)
+            except OSError as e:
+                print(f"Error saving game state: {e}")
+                with self.condition:
+                    self.error = e
+                    self.writing = False
+                    self.condition.notify_all()
+                continue
+
+            with self.condition:
+                self.writing = False
+                self.writes += 1
+                self.bytes_written += len(data)
+                self.condition.notify_all()
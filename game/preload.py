@@ -0,0 +1,62 @@
+"""
+Background asset preloading
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+
+
+class AssetPreloader:
+    """Prepares assets on a pool of worker threads while something else is on screen"""
+
+    def __init__(self, workers=None, clock=time.perf_counter):
+        """
+        Initialize preloader and its worker threads
+
+        Args:
+            workers: Worker threads, one per CPU up to four by default
+            clock: Clock returning seconds, used to time each job
+        """
+        self.clock = clock
+        self.pool = ThreadPoolExecutor(workers or min(4, os.cpu_count() or 1), thread_name_prefix="preload")
+        self.futures = {}
+        # Seconds each job took, for spotting the one holding the splash up
+        self.timings = {}
+
+    def add(self, name, function, *args):
+        """
+        Queue a job; its result is later fetched with get(name)
+
+        PIL decodes, converts and resizes without holding the GIL, so jobs run
+        in parallel. A job must not depend on another job's result.
+
+        Args:
+            name: Job name
+            function: Function doing the work
+            *args: Arguments for function
+        """
+        self.futures[name] = self.pool.submit(self._timed, name, function, args)
+
+    def _timed(self, name, function, args):
+        start = self.clock()
+        try:
+            return function(*args)
+        finally:
+            self.timings[name] = self.clock() - start
+
+    def ready(self):
+        """Check whether every job has finished"""
+        return all(future.done() for future in self.futures.values())
+
+    def get(self, name):
+        """Get a job's result, waiting for it if needed; a failed job raises its error"""
+        return self.futures[name].result()
+
+    async def wait(self):
+        """Readiness barrier: wait for every job, raising the first failure"""
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in self.futures.values()))
+
+    def close(self):
+        """Stop the worker threads once queued jobs are done"""
+        self.pool.shutdown()
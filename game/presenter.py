@@ -0,0 +1,135 @@
+"""
+Background display presenter
+"""
+import threading
+import numpy
+
+
+class Presenter:
+    """Sends finished frames to the display from a background thread"""
+
+    def __init__(self, display, width, height, buffers=2, max_regions=32):
+        """
+        Initialize presenter and start its thread
+
+        Args:
+            display: DisplayBackend the frames go to
+            width: Screen width in pixels
+            height: Screen height in pixels
+            buffers: Frame buffers, one is on the wire and the rest can queue
+            max_regions: Above this many windows a coalesced frame is sent whole
+        """
+        if buffers < 2:
+            raise ValueError("Presenter needs at least two buffers")
+        self.display = display
+        self.width = width
+        self.height = height
+        self.max_regions = max_regions
+
+        self.free = [numpy.empty(2 * width * height, numpy.uint8) for _ in range(buffers)]
+        self.pending = []
+        self.sending = False
+        self.running = True
+        self.error = None
+        self.condition = threading.Condition()
+
+        # Counters for frame pacing diagnostics
+        self.presented = 0
+        self.coalesced = 0
+
+        self.thread = threading.Thread(target=self._run, name="presenter", daemon=True)
+        self.thread.start()
+
+    def present(self, framebuffer, regions=None):
+        """
+        Queue the current framebuffer content for sending and return immediately
+
+        Args:
+            framebuffer: Framebuffer to take the pixels from
+            regions: Optional list of (x0, y0, x1, y1) boxes, None sends the whole screen
+        """
+        if regions == []:
+            return
+        with self.condition:
+            if self.error:
+                raise self.error
+            if not self.free:
+                # The panel is behind: fold this frame into the newest queued one
+                slot, _, queued_regions = self.pending.pop()
+                self.free.append(slot)
+                regions = self._merge(queued_regions, regions)
+                self.coalesced += 1
+            slot = self.free.pop()
+            self.pending.append((slot, self._snapshot(framebuffer, regions, slot), regions))
+            self.condition.notify_all()
+
+    def flush(self):
+        """Block until every queued frame is on the panel"""
+        with self.condition:
+            while (self.pending or self.sending) and not self.error:
+                self.condition.wait()
+            if self.error:
+                raise self.error
+
+    def close(self):
+        """Send what is queued and stop the thread"""
+        with self.condition:
+            self.running = False
+            self.condition.notify_all()
+        self.thread.join()
+
+    def _merge(self, first, second):
+        if first is None or second is None:
+            return None
+        regions = first + second
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if len(regions) > self.max_regions or area > self.width * self.height:
+            return None
+        return regions
+
+    def _snapshot(self, framebuffer, regions, slot):
+        """Convert the frame into slot and return the (window, offset, size) segments to send"""
+        if regions is None:
+            framebuffer.rgb565(out=slot)
+            return [(None, 0, 2 * self.width * self.height)]
+        segments = []
+        offset = 0
+        for box in regions:
+            size = 2 * (box[2] - box[0]) * (box[3] - box[1])
+            framebuffer.rgb565(box, out=slot[offset:offset + size])
+            segments.append((framebuffer.panel_window(box), offset, size))
+            offset += size
+        return segments
+
+    def _run(self):
+        display = self.display
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                slot, segments, _ = self.pending.pop(0)
+                self.sending = True
+
+            try:
+                data = memoryview(slot)
+                for window, offset, size in segments:
+                    if window:
+                        display.set_window(*window)
+                    else:
+                        display.set_window()
+                    display.data(data[offset:offset + size])
+                display.end_frame()
+            except Exception as e:
+                with self.condition:
+                    self.error = e
+                    self.sending = False
+                    self.condition.notify_all()
+                return
+
+            with self.condition:
+                self.free.append(slot)
+                self.sending = False
+                self.presented += 1
+                self.condition.notify_all()
@@ -0,0 +1,148 @@
+"""
+asyncio runtime for the game's tasks
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import inspect
+import time
+
+
+class Runtime:
+    """One event loop running the game's tasks, with a worker thread per kind of blocking work"""
+
+    def __init__(self, clock=time.perf_counter, sleep=asyncio.sleep):
+        """
+        Initialize runtime
+
+        Args:
+            clock: Clock returning seconds, used to keep periodic tasks on schedule
+            sleep: Coroutine function sleeping for a number of seconds
+        """
+        self.clock = clock
+        self.sleep = sleep
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.executors = {}
+        self.tasks = {}
+        self.stopping = None
+        # Interval of each every() task, and the smoothed time between its calls as achieved
+        self.intervals = {}
+        self.periods = {}
+
+    def executor(self, lane):
+        """
+        Get the worker thread for a kind of blocking work
+
+        Work in one lane queues behind itself but never behind another lane,
+        so a slow save cannot hold up drawing.
+
+        Args:
+            lane: Name of the lane, e.g. "render" or "io"
+        """
+        executor = self.executors.get(lane)
+        if executor is None:
+            executor = self.executors[lane] = ThreadPoolExecutor(1, thread_name_prefix=lane)
+        return executor
+
+    async def run_blocking(self, lane, function, *args):
+        """Call function(*args) on a lane's worker thread and wait for its result"""
+        return await self.loop.run_in_executor(self.executor(lane), function, *args)
+
+    def spawn(self, name, coroutine):
+        """
+        Start a task; if it fails, run() stops and raises its error
+
+        Args:
+            name: Task name, for debugging
+            coroutine: Coroutine the task runs
+        """
+        task = self.loop.create_task(coroutine, name=name)
+        self.tasks[name] = task
+        task.add_done_callback(self._task_done)
+        return task
+
+    def every(self, name, interval, function, catch_up=1):
+        """
+        Start a task calling function every interval seconds
+
+        Calls are scheduled from fixed deadlines so they do not drift. A late
+        task runs back to back until it is on time again, unless it is more than
+        catch_up calls behind, in which case the missed calls are dropped.
+
+        Args:
+            name: Task name
+            interval: Seconds between calls
+            function: Function or coroutine function taking no arguments
+            catch_up: Most missed calls made up for
+        """
+        self.intervals[name] = interval
+        return self.spawn(name, self._every(name, function, catch_up))
+
+    def set_interval(self, name, interval):
+        """Change how often an every() task runs, from its next call on"""
+        self.intervals[name] = interval
+
+    def rate(self, name):
+        """Calls per second an every() task has actually achieved, smoothed; 0 before its second call"""
+        period = self.periods.get(name)
+        return 1.0 / period if period else 0.0
+
+    async def _every(self, name, function, catch_up):
+        deadline = self.clock()
+        last_call = None
+        while True:
+            start = self.clock()
+            if last_call is not None:
+                period = self.periods.setdefault(name, start - last_call)
+                self.periods[name] = period + (start - last_call - period) * 0.1
+            last_call = start
+
+            result = function()
+            if inspect.isawaitable(result):
+                await result
+            interval = self.intervals[name]
+            deadline += interval
+            now = self.clock()
+            if now - deadline > catch_up * interval:
+                deadline = now
+            # Yield even when late, so a task behind schedule cannot starve the others
+            await self.sleep(max(0.0, deadline - now))
+
+    def _task_done(self, task):
+        if self.tasks.get(task.get_name()) is task:
+            del self.tasks[task.get_name()]
+        if task.cancelled() or self.stopping is None or self.stopping.done():
+            return
+        if task.exception() is not None:
+            self.stopping.set_exception(task.exception())
+
+    def run(self, coroutine=None):
+        """
+        Run a coroutine to completion, or without one every spawned task until stop()
+
+        Returns:
+            Whatever the coroutine returned
+        """
+        if coroutine is not None:
+            return self.loop.run_until_complete(coroutine)
+        self.stopping = self.loop.create_future()
+        try:
+            self.loop.run_until_complete(self.stopping)
+        finally:
+            self.stopping = None
+
+    def stop(self):
+        """Make run() return"""
+        if self.stopping is not None and not self.stopping.done():
+            self.stopping.set_result(None)
+
+    def close(self):
+        """Cancel the tasks, wait for blocking work in progress and close the loop"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks and not self.loop.is_closed():
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        for executor in self.executors.values():
+            executor.shutdown()
+        self.loop.close()
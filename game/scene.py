@@ -0,0 +1,60 @@
+"""
+Layout of the game screen, shared by main.py and the benchmarks
+"""
+from game.constants import WIDTH, HEIGHT
+from game.starfield import StarLayer
+
+# Distant dim stars drift slower than the near ones
+STAR_LAYERS = [
+    StarLayer(count=300, speed=0.25, size=1, color=(120, 120, 140)),
+    StarLayer(count=120, speed=0.5, size=2, color=(190, 190, 220)),
+    StarLayer(count=60, speed=1.0, size=3, color=(255, 255, 255)),
+]
+
+# Ship parts bottom to top: slot, where it sits on the ship, sprite prefix and number of variants
+SHIP_SIZE = (99, 60)
+SHIP_SLOTS = [
+    ("base", (0, 0), "base", 8),
+    ("engine_top", (0, 0), "engine", 9),
+    ("engine_bottom", (0, 30), "engine", 10),
+    ("storage_top", (33, 0), "storagetop", 9),
+    ("storage_bottom", (33, 30), "storagebottom", 10),
+    ("cabin", (66, 0), "cabin", 21),
+    ("gun", (66, 30), "gun", 10),
+    ("logo", (0, 0), "logo", 14),
+    ("pipes", (0, 0), "pipes", 10),
+    ("wires", (0, 0), "wires", 7),
+]
+SHIP_PART_PREFIXES = list(dict.fromkeys(prefix for _, _, prefix, _ in SHIP_SLOTS))
+
+# Engine flames sit this far from the ship's top left corner, behind the engines
+FLAME_OFFSET = (-99, 0)
+
+# Fixed ambient lights: 2 red (back), 2 green (front)
+AMBIENT_LIGHTS = [
+    {'x': WIDTH // 2 - 40, 'y': HEIGHT // 2 - 10, 'type': 'red', 'shape': 'circle'},
+    {'x': WIDTH // 2 - 20, 'y': HEIGHT // 2 - 5, 'type': 'red', 'shape': 'circle'},
+    {'x': WIDTH // 2 + 20, 'y': HEIGHT // 2 + 5, 'type': 'green', 'shape': 'circle'},
+    {'x': WIDTH // 2 + 35, 'y': HEIGHT // 2 + 10, 'type': 'green', 'shape': 'circle'},
+]
+
+
+def ship_position(ship):
+    """Top left corner that centres a ship image on the screen"""
+    return (WIDTH // 2 - ship.width // 2, HEIGHT // 2 - ship.height // 2)
+
+
+def light_color(light, flash_state):
+    """Colour of an ambient light, bright while flashed on"""
+    if light['type'] == 'red':
+        return (255, 50, 50) if flash_state else (100, 0, 0)
+    return (50, 255, 50) if flash_state else (0, 100, 0)
+
+
+def draw_light(draw, light, flash_state):
+    """Draw one ambient light with a PIL ImageDraw"""
+    lx, ly = light['x'], light['y']
+    if light['shape'] == 'circle':
+        draw.ellipse((lx, ly, lx + 2, ly + 2), fill=light_color(light, flash_state))
+    else:
+        draw.line((lx, ly, lx + 3, ly), fill=light_color(light, flash_state), width=1)
@@ -0,0 +1,171 @@
+"""
+Timers and random event scheduling on the simulation clock
+"""
+import random
+
+
+class Timer:
+    """A callback due on a simulation tick, optionally repeating"""
+
+    def __init__(self, due, interval, callback, args):
+        self.due = due
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self):
+        """Stop the timer, it is dropped when its slot next comes round"""
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timer wheel: advancing a tick only looks at the timers in that tick's slot"""
+
+    def __init__(self, tick=1.0 / 30, slots=256):
+        """
+        Initialize timer wheel
+
+        Args:
+            tick: Seconds of simulation time per tick, the timers' resolution
+            slots: Slots on the wheel; timers further out than this many ticks wait extra turns
+        """
+        self.tick = tick
+        self.slots = [[] for _ in range(slots)]
+        self.ticks = 0
+
+    @property
+    def time(self):
+        """Simulated seconds since the wheel started"""
+        return self.ticks * self.tick
+
+    def _ticks(self, seconds):
+        return max(1, round(seconds / self.tick))
+
+    def _insert(self, timer):
+        self.slots[timer.due % len(self.slots)].append(timer)
+
+    def schedule(self, delay, callback, *args):
+        """
+        Call callback(*args) once, delay seconds of simulation time from now
+
+        Returns:
+            Timer: Handle for cancelling
+        """
+        timer = Timer(self.ticks + self._ticks(delay), None, callback, args)
+        self._insert(timer)
+        return timer
+
+    def every(self, interval, callback, *args):
+        """
+        Call callback(*args) every interval seconds of simulation time, first after one interval
+
+        Returns:
+            Timer: Handle for cancelling
+        """
+        interval_ticks = self._ticks(interval)
+        timer = Timer(self.ticks + interval_ticks, interval_ticks, callback, args)
+        self._insert(timer)
+        return timer
+
+    def remaining(self, timer):
+        """Seconds of simulation time until a timer is due"""
+        return max(0, timer.due - self.ticks) * self.tick
+
+    def advance(self, ticks=1):
+        """Move the clock on, firing every timer that comes due in order"""
+        for _ in range(ticks):
+            self.ticks += 1
+            slot = self.slots[self.ticks % len(self.slots)]
+            if not slot:
+                continue
+            due = [timer for timer in slot if timer.due <= self.ticks]
+            if not due:
+                continue
+            slot[:] = [timer for timer in slot if timer.due > self.ticks]
+            for timer in due:
+                if timer.cancelled:
+                    continue
+                if timer.interval:
+                    timer.due = self.ticks + timer.interval
+                    self._insert(timer)
+                timer.callback(*timer.args)
+
+    def advance_to(self, seconds):
+        """Advance until the wheel's time reaches seconds, for loops driven by wall time"""
+        ticks = int(seconds / self.tick) - self.ticks
+        if ticks > 0:
+            self.advance(ticks)
+
+
+def exponential(rng, mean):
+    """Memoryless gaps: events arrive as a Poisson process averaging one per mean seconds"""
+    return rng.expovariate(1.0 / mean)
+
+
+def fixed(rng, mean):
+    """Every gap exactly mean seconds"""
+    return mean
+
+
+class EventScheduler:
+    """Fires a callback at random times, each one drawn ahead on the simulation clock"""
+
+    def __init__(self, timers, mean_interval, callback, distribution=exponential, rng=None, prepare=None):
+        """
+        Initialize event scheduler, start() arms it
+
+        Args:
+            timers: TimerWheel the event times live on
+            mean_interval: Average seconds between events
+            callback: Called with no arguments when an event is due; returning
+                False means the event could not happen now and is dropped
+            distribution: Function (rng, mean) returning the seconds to the next event
+            rng: random.Random to draw from, the random module by default
+            prepare: Called with no arguments each time the next event's time is
+                drawn, to get that event ready while it is still ahead
+        """
+        self.timers = timers
+        self.mean_interval = mean_interval
+        self.callback = callback
+        self.distribution = distribution
+        self.rng = rng or random
+        self.prepare = prepare
+        self.timer = None
+        self.fired = 0
+        self.dropped = 0
+
+    def start(self, delay=None):
+        """
+        Arm the scheduler, replacing any pending event time
+
+        Args:
+            delay: Seconds to the first event, drawn from the distribution when None
+        """
+        self.stop()
+        if delay is None:
+            delay = self.distribution(self.rng, self.mean_interval)
+        self.timer = self.timers.schedule(delay, self._fire)
+        if self.prepare:
+            self.prepare()
+
+    def stop(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    @property
+    def due_in(self):
+        """Seconds of simulation time until the next event, None when stopped"""
+        if not self.timer:
+            return None
+        return self.timers.remaining(self.timer)
+
+    def _fire(self):
+        self.timer = None
+        if self.callback() is False:
+            self.dropped += 1
+        else:
+            self.fired += 1
+        if self.timer is None:
+            self.start()
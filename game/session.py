@@ -0,0 +1,81 @@
+"""
+State of one run of the game
+
+Assets, fonts, caches and the display outlive a session, so starting a new run
+only means resetting it.
+"""
+
+
+class GameSession:
+    """Everything that belongs to one run, from launch to game over"""
+
+    def __init__(self, ship_image, boost_points=10, repair_points=2):
+        """
+        Initialize session
+
+        Args:
+            ship_image: RGBA image of this run's ship
+            boost_points: Boost points a run starts with
+            repair_points: Repair points a run starts with
+        """
+        self.start_boost_points = boost_points
+        self.start_repair_points = repair_points
+        self.runs = 0
+        self.reset(ship_image)
+
+    def reset(self, ship_image):
+        """Start a new run with a new ship"""
+        self.runs += 1
+        self.ship_image = ship_image
+
+        self.distance_covered = 0
+        self.boost_active = False
+        self.boost_points = self.start_boost_points
+        self.boost_end_time = 0
+        self.repair_points = self.start_repair_points
+        self.damaged_systems = []
+
+        self.current_event = None
+        self.event_display = None
+
+        self.light_flash_state = True
+
+        # Set once the ship has blown up, a finished run is never saved
+        self.over = False
+        self.last_flame_index = -1
+
+    def snapshot(self):
+        """
+        Get the part of the run that is saved
+
+        Returns:
+            dict: JSON-friendly run state, restore() takes it back
+        """
+        return {
+            "distance_covered": self.distance_covered,
+            "boost_active": self.boost_active,
+            "boost_points": self.boost_points,
+            "boost_end_time": self.boost_end_time,
+            "repair_points": self.repair_points,
+            "damaged_systems": list(self.damaged_systems),
+        }
+
+    def restore(self, saved):
+        """
+        Carry on from a saved run
+
+        Fields missing from the save, e.g. one written before they existed,
+        keep their values from the start of a run.
+
+        Args:
+            saved: Dict from snapshot()
+
+        Raises:
+            AttributeError, TypeError, ValueError: The save is not a run state
+        """
+        self.distance_covered = saved.get("distance_covered", self.distance_covered)
+        self.boost_active = saved.get("boost_active", self.boost_active)
+        self.boost_points = saved.get("boost_points", self.boost_points)
+        self.boost_end_time = saved.get("boost_end_time", self.boost_end_time)
+        self.repair_points = saved.get("repair_points", self.repair_points)
+        self.damaged_systems = list(saved.get("damaged_systems", self.damaged_systems))
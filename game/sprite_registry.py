@@ -0,0 +1,71 @@
+"""
+In-memory registry of numbered sprite variants
+"""
+from collections import OrderedDict
+import random
+import re
+
+
+class SpriteRegistry:
+    """Indexes numbered sprites such as cabin1..cabin21 by prefix and keeps them decoded"""
+
+    def __init__(self, source, max_prefixes=12):
+        """
+        Initialize registry
+
+        Args:
+            source: SpriteAtlas or SpriteDirectory to load variants from
+            max_prefixes: Number of prefixes kept decoded before the least recently used is dropped
+        """
+        self.source = source
+        self.max_prefixes = max_prefixes
+        self.cache = OrderedDict()
+        self.loads = 0
+
+    def variants(self, prefix):
+        """
+        Get every variant of a prefix, loading them all on the first request
+
+        Args:
+            prefix: Sprite name without its number, e.g. "cabin"
+
+        Returns:
+            dict: Variant number to RGBA image
+        """
+        if prefix in self.cache:
+            self.cache.move_to_end(prefix)
+            return self.cache[prefix]
+
+        pattern = re.compile(re.escape(prefix) + r"(\d+)")
+        found = {}
+        for name in self.source.names():
+            match = pattern.fullmatch(name)
+            if match:
+                found[int(match.group(1))] = self.source.get(name)
+        self.loads += 1
+
+        self.cache[prefix] = found
+        if len(self.cache) > self.max_prefixes:
+            self.cache.popitem(last=False)
+        return found
+
+    def preload(self, prefixes):
+        """Load several prefixes up front, e.g. every ship part before the build intro"""
+        for prefix in prefixes:
+            self.variants(prefix)
+
+    def get(self, prefix, index):
+        """
+        Get one variant
+
+        Raises:
+            FileNotFoundError: If there is no sprite with that number
+        """
+        sprite = self.variants(prefix).get(index)
+        if sprite is None:
+            raise FileNotFoundError(f"Missing sprite: {prefix}{index}")
+        return sprite
+
+    def random(self, prefix, max_index):
+        """Pick one of variants 1 to max_index at random"""
+        return self.get(prefix, random.randint(1, max_index))
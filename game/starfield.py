@@ -0,0 +1,133 @@
+"""
+Vectorized parallax starfield
+"""
+import numpy
+from PIL import Image, ImageDraw
+
+
+class StarLayer:
+    """Parallax layer settings"""
+
+    def __init__(self, count, speed, size, color):
+        """
+        Initialize star layer
+
+        Args:
+            count: Number of stars in the layer
+            speed: Pixels moved per step at speed factor 1
+            size: Diameter of each star in pixels
+            color: RGB colour of the layer
+        """
+        self.count = count
+        self.speed = speed
+        self.size = size
+        self.color = color
+
+
+def star_stamp(size):
+    """Pixel offsets of a star, matching what ImageDraw.ellipse draws for that size"""
+    mask = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(mask).ellipse((0, 0, size - 1, size - 1), fill=255)
+    dy, dx = numpy.nonzero(numpy.array(mask))
+    if not len(dy):
+        # Pillow draws nothing for a one pixel ellipse, a star should still show
+        dy, dx = numpy.zeros(1, numpy.int32), numpy.zeros(1, numpy.int32)
+    return dy, dx
+
+
+class Starfield:
+    """Stars of every parallax layer, stored as NumPy arrays"""
+
+    def __init__(self, width, height, layers, seed=None):
+        """
+        Initialize starfield
+
+        Args:
+            width: Screen width in pixels
+            height: Screen height in pixels
+            layers: List of StarLayer, back to front
+            seed: Optional seed for reproducible star positions
+        """
+        self.width = width
+        self.height = height
+        self.rng = numpy.random.default_rng(seed)
+
+        count = sum(layer.count for layer in layers)
+        self.x = self.rng.uniform(0, width, count)
+        self.y = self.rng.integers(0, height, count)
+        self.speed = numpy.concatenate([numpy.full(layer.count, layer.speed, numpy.float64) for layer in layers])
+        self.size = numpy.concatenate([numpy.full(layer.count, layer.size, numpy.int32) for layer in layers])
+        self.color = numpy.concatenate(
+            [numpy.tile(numpy.array(layer.color, numpy.uint8), (layer.count, 1)) for layer in layers]
+        )
+
+        # Flatten every pixel of every star into one list so drawing is a single scatter
+        stamps = {size: star_stamp(size) for size in set(self.size.tolist())}
+        per_star = [stamps[size] for size in self.size.tolist()]
+        empty = [numpy.zeros(0, numpy.intp)]
+        self.stamp_star = numpy.repeat(numpy.arange(count), [len(dy) for dy, _ in per_star])
+        self.stamp_dy = numpy.concatenate([dy for dy, _ in per_star] + empty)
+        self.stamp_dx = numpy.concatenate([dx for _, dx in per_star] + empty)
+        self.stamp_color = self.color[self.stamp_star]
+
+        # Position before the last step, the start point for interpolation
+        self.prev_x = self.x.copy()
+
+        self.px = self.x.astype(numpy.int32)
+        self.py = self.y.astype(numpy.int32)
+        self.old_px = self.px
+        self.old_py = self.py
+
+    def __len__(self):
+        return len(self.x)
+
+    def step(self, speed_factor=1.0):
+        """Move every star left, respawning the ones that left the screen on the right"""
+        numpy.copyto(self.prev_x, self.x)
+        self.x -= self.speed * speed_factor
+        wrapped = self.x < 0
+        respawns = int(wrapped.sum())
+        if respawns:
+            self.x[wrapped] = self.width
+            self.y[wrapped] = self.rng.integers(0, self.height, respawns)
+            # A respawned star jumps, it should not slide across the screen
+            self.prev_x[wrapped] = self.width
+
+    def interpolate(self, alpha=1.0):
+        """
+        Place the stars for drawing between their last two steps
+
+        Args:
+            alpha: 0 for the position before the last step, 1 for the current one
+        """
+        self.old_px, self.old_py = self.px, self.py
+        self.px = (self.prev_x + (self.x - self.prev_x) * alpha).astype(numpy.int32)
+        self.py = self.y.astype(numpy.int32)
+
+    def damage_boxes(self):
+        """
+        Get the boxes touched by the last interpolate, old and new position of every
+        star that changed pixel
+
+        Returns:
+            tuple: x0, y0, x1, y1 arrays, x1/y1 exclusive
+        """
+        moved = (self.px != self.old_px) | (self.py != self.old_py)
+        size = numpy.concatenate((self.size[moved], self.size[moved]))
+        x0 = numpy.concatenate((self.old_px[moved], self.px[moved]))
+        y0 = numpy.concatenate((self.old_py[moved], self.py[moved]))
+        return x0, y0, x0 + size, y0 + size
+
+    def draw(self, pixels, origin=(0, 0)):
+        """
+        Stamp every star into an RGB or RGBA pixel array
+
+        Args:
+            pixels: Writable (height, width, channels) uint8 array
+            origin: Screen position of the array's top left corner
+        """
+        height, width = pixels.shape[:2]
+        xs = self.px[self.stamp_star] + (self.stamp_dx - origin[0])
+        ys = self.py[self.stamp_star] + (self.stamp_dy - origin[1])
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        pixels[ys[inside], xs[inside], :3] = self.stamp_color[inside]
@@ -0,0 +1,75 @@
+"""
+Startup timeline
+"""
+import json
+import os
+import time
+
+
+def _process_age():
+    """Seconds since the process started, None where /proc is unavailable"""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Field 22 is the start time in clock ticks after boot; the name field can hold spaces
+            start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as uptime:
+            seconds_since_boot = float(uptime.read().split()[0])
+        return max(0.0, seconds_since_boot - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _uptime():
+    try:
+        with open("/proc/uptime") as uptime:
+            return float(uptime.read().split()[0])
+    except (OSError, ValueError):
+        return None
+
+
+class StartupTimeline:
+    """Times startup milestones, e.g. first pixel and first interactive frame"""
+
+    def __init__(self, clock=time.perf_counter):
+        """
+        Initialize timeline, as early as possible in the main script
+
+        Args:
+            clock: Clock returning seconds
+        """
+        self.clock = clock
+        self.origin = clock()
+        # Time the interpreter spent starting up before the timeline existed
+        self.before_origin = _process_age() or 0.0
+        self.marks = {}
+
+    def mark(self, name):
+        """Record that a milestone was reached, only the first time counts"""
+        if name not in self.marks:
+            self.marks[name] = self.before_origin + self.clock() - self.origin
+
+    def report(self):
+        """One line listing each milestone's seconds since the process started"""
+        return ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.marks.items())
+
+    def finish(self, path=None):
+        """
+        Print the report and optionally append it to a JSON lines file
+
+        Args:
+            path: File collecting one JSON record per boot, to compare cold and warm starts
+        """
+        print(f"Startup: {self.report()}")
+        if not path:
+            return
+        record = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "uptime": _uptime(),
+            "interpreter": round(self.before_origin, 4),
+            "marks": {name: round(seconds, 4) for name, seconds in self.marks.items()},
+        }
+        try:
+            with open(path, "a") as output:
+                output.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Error writing startup timeline: {e}")
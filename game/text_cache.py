@@ -0,0 +1,87 @@
+"""
+Cache of rasterized text for repeated HUD strings
+"""
+from collections import OrderedDict
+import math
+from PIL import Image, ImageDraw
+
+
+class TextCache:
+    """Keeps the coverage masks of drawn strings so unchanged text is a masked blit"""
+
+    def __init__(self, max_bytes=256 * 1024):
+        """
+        Initialize text cache
+
+        Args:
+            max_bytes: Total mask size kept before the least recently used strings are dropped
+        """
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.masks = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def mask(self, text, font, start=(0.0, 0.0)):
+        """
+        Get the coverage mask of a string
+
+        Args:
+            text: Single-line string
+            font: PIL font object
+            start: Sub-pixel part of a non-negative draw position, which shifts anti-aliased glyphs
+
+        Returns:
+            tuple: ("L" mask, (x, y) offset of the mask from the integer draw position)
+        """
+        key = (text, font, start)
+        entry = self.masks.get(key)
+        if entry is not None:
+            self.masks.move_to_end(key)
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        left, top, right, bottom = ImageDraw.Draw(Image.new("L", (1, 1))).textbbox((0, 0), text, font=font)
+        # Draw at a non-negative origin so the sub-pixel part is applied the way ImageDraw.text applies it
+        origin = (max(-math.floor(left), 0), max(-math.floor(top), 0))
+        canvas = Image.new("L", (origin[0] + math.ceil(right) + 2, origin[1] + math.ceil(bottom) + 2), 0)
+        ImageDraw.Draw(canvas).text((origin[0] + start[0], origin[1] + start[1]), text, font=font, fill=255)
+        bbox = canvas.getbbox() or (0, 0, 1, 1)
+        mask = canvas.crop(bbox)
+        entry = (mask, (bbox[0] - origin[0], bbox[1] - origin[1]))
+
+        self.masks[key] = entry
+        self.size += mask.width * mask.height
+        while self.size > self.max_bytes and len(self.masks) > 1:
+            _, (old_mask, _) = self.masks.popitem(last=False)
+            self.size -= old_mask.width * old_mask.height
+        return entry
+
+    def draw(self, draw, xy, text, font, fill):
+        """
+        Draw a string like ImageDraw.text, rasterizing it only on a cache miss
+
+        Args:
+            draw: ImageDraw of the target image
+            xy: Top left position, may be fractional
+            text: Single-line string
+            font: PIL font object
+            fill: Text colour
+        """
+        x, y = xy
+        if x < 0 or y < 0:
+            # Text hanging off the top or left edge is rare, draw it directly
+            draw.text(xy, text, font=font, fill=fill)
+            return
+        start = (math.modf(x)[0], math.modf(y)[0])
+        mask, (dx, dy) = self.mask(text, font, start)
+        draw.bitmap((int(x) + dx, int(y) + dy), mask, fill=fill)
+
+    def clear(self):
+        self.masks.clear()
+        self.size = 0
+
+
+# Shared by the game screen and the UI widgets
+text_cache = TextCache()
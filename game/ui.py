@@ -1,8 +1,12 @@
 # ui.py – PIL-based Display Rewrite for Display HAT Mini
+from collections import OrderedDict
+import threading
 import time
 import random
-from PIL import ImageFont, ImageDraw
+from PIL import Image, ImageDraw
 from game.constants import *
+from game.text_cache import text_cache
+from game.fonts import fonts
 
 class StatusBar:
     def __init__(self, display_config, speed, boost_active, boost_points, repair_points, damaged_systems, distance):
@@ -25,11 +29,12 @@ class StatusBar:
         ]
 
         self.message_index = 0
-        self.last_message_change = time.time()
         self.flicker = False
-        self.last_flicker_time = time.time()
+        self.timers = None
+        # Optional diagnostics text, e.g. frame statistics, shown at the bottom right
+        self.overlay = None
 
-        self.font = ImageFont.load_default()
+        self.font = fonts.get()
         self.height = MINI_STATUS_BAR_HEIGHT if display_config.is_display_hat_mini else STATUS_BAR_HEIGHT
 
     def update(self, speed, boost_active, boost_points, repair_points, damaged_systems, distance):
@@ -39,13 +44,25 @@ class StatusBar:
         self.repair_points = repair_points
         self.damaged_systems = damaged_systems
         self.distance = distance
-        now = time.time()
-        if now - self.last_message_change > 5:
-            self.message_index = (self.message_index + 1) % len(self.messages)
-            self.last_message_change = now
-        if damaged_systems and now - self.last_flicker_time > (0.5 + random.random() * 0.5):
+
+    def schedule(self, timers):
+        # Message rotation and the damage flicker run off timers instead of clock checks every update
+        self.timers = timers
+        timers.every(5, self.rotate_message)
+        timers.schedule(0.5 + random.random() * 0.5, self.toggle_flicker)
+
+    def rotate_message(self):
+        self.message_index = (self.message_index + 1) % len(self.messages)
+
+    def toggle_flicker(self):
+        if self.damaged_systems:
             self.flicker = not self.flicker
-            self.last_flicker_time = now
+        self.timers.schedule(0.5 + random.random() * 0.5, self.toggle_flicker)
+
+    def render_key(self):
+        # Everything draw() depends on, so callers can skip unchanged frames
+        return (self.speed, self.boost_active, bool(self.damaged_systems), len(self.damaged_systems),
+                self.flicker, self.distance, self.message_index, self.overlay)
 
     def draw(self, draw):
         width = self.display_config.width
@@ -56,7 +73,7 @@ class StatusBar:
         draw.rectangle([0, y_pos, width, y_pos + height], fill=bg_color)
 
         draw.line([0, y_pos, width, y_pos], fill=COLOR_GREEN_DARK, width=1)
-        draw.text((5, y_pos + 2), f"SPD: {self.speed * 2 if self.boost_active else self.speed} mi/s", font=self.font, fill=COLOR_YELLOW if self.boost_active else COLOR_GREEN)
+        text_cache.draw(draw, (5, y_pos + 2), f"SPD: {self.speed * 2 if self.boost_active else self.speed} mi/s", font=self.font, fill=COLOR_YELLOW if self.boost_active else COLOR_GREEN)
 
         if self.damaged_systems:
             sys_text = f"SYS: {len(self.damaged_systems)} DMG"
@@ -65,15 +82,19 @@ class StatusBar:
             sys_text = "SYS: OK"
             sys_color = COLOR_GREEN
 
-        text_width = draw.textlength(sys_text, font=self.font)
-        draw.text((width - text_width - 5, y_pos + 2), sys_text, font=self.font, fill=sys_color)
+        text_width = fonts.metrics(self.font).textlength(sys_text)
+        text_cache.draw(draw, (width - text_width - 5, y_pos + 2), sys_text, font=self.font, fill=sys_color)
 
 
-        draw.text((5, y_pos + 14), f"DST: {self.distance}", font=self.font, fill=COLOR_GREEN)
+        text_cache.draw(draw, (5, y_pos + 14), f"DST: {self.distance}", font=self.font, fill=COLOR_GREEN)
 
 
         if self.display_config.is_display_hat_mini:
-            draw.text(((width - 60) // 2, y_pos + 14), self.messages[self.message_index][:8], font=self.font, fill=COLOR_GREEN)
+            text_cache.draw(draw, ((width - 60) // 2, y_pos + 14), self.messages[self.message_index][:8], font=self.font, fill=COLOR_GREEN)
+
+        if self.overlay:
+            overlay_width = fonts.metrics(self.font).textlength(self.overlay)
+            text_cache.draw(draw, (width - overlay_width - 5, y_pos + 14), self.overlay, font=self.font, fill=COLOR_YELLOW)
 
 
 class ButtonBar:
@@ -85,7 +106,7 @@ class ButtonBar:
         self.damaged_count = damaged_count
         self.event_active = event_active
         self.height = MINI_BUTTON_HEIGHT if display_config.is_display_hat_mini else BUTTON_HEIGHT
-        self.font = ImageFont.load_default()
+        self.font = fonts.get()
 
     def update(self, boost_points, boost_active, repair_points, damaged_count, event_active):
         self.boost_points = boost_points
@@ -98,23 +119,48 @@ class ButtonBar:
         pass
 
 
-class EventDisplay:
-    def __init__(self, display_config, event):
+class EventCardLayout:
+    # Everything the card shows, measured and wrapped once per event template
+    def __init__(self, display_config, title, description, options):
         self.display_config = display_config
-        self.event = event
-        self.create_time = time.time()
-        self.title_font = ImageFont.load_default()
-        self.text_font = ImageFont.load_default()
-        self.option_font = ImageFont.load_default()
+        self.title_font = fonts.get()
+        self.text_font = fonts.get()
+        self.option_font = fonts.get()
 
-    def wrap_text(self, draw, text, max_width):
+        width = display_config.width
+        height = display_config.height
+
+        margin = 10
+        card_width = width - 2 * margin
+        card_height = height - 2 * margin
+        card_x = margin
+        card_y = margin
+        self.box = [card_x, card_y, card_x + card_width, card_y + card_height]
+
+        title_w = fonts.metrics(self.title_font).textlength(title)
+        self.texts = [((card_x + (card_width - title_w) // 2, card_y + 10), title, self.title_font, COLOR_GREEN)]
+
+        y_offset = card_y + 30
+        for line in self.wrap_text(description, card_width - 20):
+            self.texts.append(((card_x + 10, y_offset), line, self.text_font, COLOR_WHITE))
+            y_offset += 14
+
+        if options:
+            self.texts.append(((card_x + 10, y_offset + 10), f"A: {options[0].text}", self.option_font, COLOR_YELLOW))
+            if len(options) > 1:
+                self.texts.append(((card_x + 10, y_offset + 30), f"X: {options[1].text}", self.option_font, COLOR_YELLOW))
+
+        self.image = None
+
+    def wrap_text(self, text, max_width):
+        metrics = fonts.metrics(self.text_font)
         words = text.split()
         lines = []
         current_line = ""
 
         for word in words:
             test_line = current_line + word + " "
-            if draw.textlength(test_line, font=self.text_font) < max_width:
+            if metrics.textlength(test_line) < max_width:
                 current_line = test_line
             else:
                 lines.append(current_line.strip())
@@ -126,35 +172,65 @@ class EventDisplay:
         return lines
 
     def draw(self, draw):
-        width = self.display_config.width
-        height = self.display_config.height
+        draw.rectangle(self.box, outline=COLOR_PURPLE, width=2)
+        for xy, text, font, color in self.texts:
+            text_cache.draw(draw, xy, text, font=font, fill=color)
 
-        # Draw event box
-        margin = 10
-        card_width = width - 2 * margin
-        card_height = height - 2 * margin
-        card_x = margin
-        card_y = margin
+    def render(self):
+        # Whole screen with the card on black, drawn on first use and then kept
+        if self.image is None:
+            self.image = Image.new("RGB", (self.display_config.width, self.display_config.height), COLOR_BLACK)
+            self.draw(ImageDraw.Draw(self.image))
+        return self.image
 
-        draw.rectangle([card_x, card_y, card_x + card_width, card_y + card_height], outline=COLOR_PURPLE, width=2)
 
-        # Draw title
-        title = self.event.title
-        title_w = draw.textlength(title, font=self.title_font)
-        draw.text((card_x + (card_width - title_w) // 2, card_y + 10), title, font=self.title_font, fill=COLOR_GREEN)
+class EventCards:
+    # Cards are laid out and drawn on first use and only the last few are kept, so the catalog's size costs nothing
+    def __init__(self, display_config, capacity=4):
+        self.display_config = display_config
+        self.capacity = capacity
+        self.layouts = OrderedDict()
+        # prepare() runs on the render thread while the game loop opens events
+        self.lock = threading.Lock()
+
+    def layout(self, title, description, options):
+        key = (title, description)
+        with self.lock:
+            layout = self.layouts.get(key)
+            if layout is None:
+                layout = self.layouts[key] = EventCardLayout(self.display_config, title, description, options)
+                if len(self.layouts) > self.capacity:
+                    self.layouts.popitem(last=False)
+            else:
+                self.layouts.move_to_end(key)
+            return layout
 
-        # Draw description
-        description_lines = self.wrap_text(draw, self.event.description, card_width - 20)
-        y_offset = card_y + 30
-        for line in description_lines:
-            draw.text((card_x + 10, y_offset), line, font=self.text_font, fill=COLOR_WHITE)
-            y_offset += 14
+    def prepare(self, event):
+        # Lay out and draw an event's card ahead of it opening, so the opening frame only pastes it
+        self.layout(event.title, event.description, event.options).render()
+
+    def display(self, event):
+        return EventDisplay(self.display_config, event, self.layout(event.title, event.description, event.options))
+
+
+class EventDisplay:
+    def __init__(self, display_config, event, layout=None):
+        self.display_config = display_config
+        self.event = event
+        self.create_time = time.time()
+        self.layout = layout or EventCardLayout(display_config, event.title, event.description, event.options)
+        self.title_font = self.layout.title_font
+        self.text_font = self.layout.text_font
+        self.option_font = self.layout.option_font
+
+    def wrap_text(self, draw, text, max_width):
+        return self.layout.wrap_text(text, max_width)
+
+    def draw(self, draw):
+        self.layout.draw(draw)
 
-        # Draw options
-        if self.event.options:
-            draw.text((card_x + 10, y_offset + 10), f"A: {self.event.options[0]['text']}", font=self.option_font, fill=COLOR_YELLOW)
-            if len(self.event.options) > 1:
-                draw.text((card_x + 10, y_offset + 30), f"X: {self.event.options[1]['text']}", font=self.option_font, fill=COLOR_YELLOW)
+    def render(self):
+        return self.layout.render()
 
 
 class MilestoneDisplay:
@@ -1,440 +1,743 @@
 # main.py – Updated Game Logic with Ship Flicker Intro
 
+# Only what the logo needs is imported before it is on screen, the rest loads behind it
 import time
-import random
-from PIL import Image, ImageDraw, ImageFont
+from game.startup import StartupTimeline
+
+timeline = StartupTimeline()
+
 import os
-import displayhatmini as dhm
-import sys
+from game.constants import WIDTH, HEIGHT, COLOR_GREEN, COLOR_RED
+from game.framebuffer import Framebuffer
+from game.presenter import Presenter
+from game.display_backend import open_display
+from game.atlas import SPRITE_DIR, open_sprites
+from PIL import Image
 
+timeline.mark("imports")
+
+# === Display Setup ===
+framebuffer = Framebuffer(WIDTH, HEIGHT)
+buffer = framebuffer.image  # PIL view, drawing on it writes straight into the framebuffer
+display = open_display(buffer, WIDTH, HEIGHT)
+presenter = Presenter(display, WIDTH, HEIGHT)
+timeline.mark("display_init")
+
+# === Show Intro Logo, straight from its PNG so the atlas is never waited on for it ===
+LOGO_PATH = os.path.join(SPRITE_DIR, "SpaceSim_logo_5.png")
+splash_start = time.time()
+logo_shown = os.path.exists(LOGO_PATH)
+if logo_shown:
+    logo_image = Image.open(LOGO_PATH).convert("RGB").resize((WIDTH, HEIGHT))
+    buffer.paste(logo_image)
+    presenter.present(framebuffer)
+    presenter.flush()
+    timeline.mark("first_pixel")
+
+# === Sprites, served from the packed atlas ===
+# Checking the atlas against every PNG, and packing it on first boot, runs behind the logo
+from game.preload import AssetPreloader
+
+preloader = AssetPreloader()
+preloader.add("sprites", open_sprites)
+
+# === Everything else loads while the logo is up ===
+import asyncio
+import math
+import random
+from PIL import ImageDraw
 
-from game.constants import WIDTH, HEIGHT, COLOR_BLACK, COLOR_GREEN, COLOR_RED
 from game.events import get_random_event
-from game.ui import StatusBar, ButtonBar, EventDisplay
+from game.ui import StatusBar, ButtonBar, EventCards
+from game.damage import DamageTracker, sprite_box
+from game.input import InputQueue, PRESS, RELEASE
+from game.compositor import LayerCompositor, ShipCompositor, Canvas, blit
+from game.clips import Clip, silhouette
+from game.starfield import Starfield
+from game.runtime import Runtime
+from game.persistence import StateStore
+from game.session import GameSession
+from game.instrument import Instrumentation
+from game.text_cache import text_cache
+from game.fonts import fonts, DEJAVU_SANS_BOLD
+from game.sprite_registry import SpriteRegistry
+from game.display_config import detect_display
+from game.scheduler import TimerWheel, EventScheduler
+from game.offline import offline_progress, suspended_time, time_away
+from game.scene import (
+    STAR_LAYERS, SHIP_SIZE, SHIP_SLOTS, SHIP_PART_PREFIXES, FLAME_OFFSET, AMBIENT_LIGHTS, ship_position, draw_light
+)
 
-# === Load explosion frames ===
-EXPLOSION_FRAMES = [
-    Image.open(os.path.join("sprites", f"exp{i}.png")).convert("RGBA")
-    for i in range(1, 7)
-]
+timeline.mark("deferred_imports")
+
+sprites = preloader.get("sprites")
+sprite_registry = SpriteRegistry(sprites)
+SPLASH_SECONDS = 2  # Shortest time the logo stays up
 
-# === Load engine flame animation frames ===
-ENGINE_FLAME_FRAMES = [
-    Image.open(os.path.join("sprites", f"flame{i}.png")).convert("RGBA")
-    for i in range(1, 5)
-]
-ENGINE_FLAME_BIG_FRAMES = [
-    Image.open(os.path.join("sprites", f"flamebig{i}.png")).convert("RGBA")
-    for i in range(1, 5)
-]
 
+# === Timing: the simulation ticks at a fixed rate, rendering is paced separately ===
+SIM_TICK_RATE = 30  # Star speeds and distance are per tick
+SIM_TICK = 1.0 / SIM_TICK_RATE
+TARGET_FPS = int(os.environ.get("SPACEPILOT_FPS", 30))  # Fewer frames save power, gameplay speed is the same
+LIGHT_FLASH_INTERVAL = 0.5  # Seconds between ambient light toggles
+EVENT_MEAN_INTERVAL = 1 / (0.0002 * SIM_TICK_RATE)  # Seconds, the rate of the old 0.0002 roll every tick
+
+# === Saving: the current run is kept so a power cut or restart carries on from it ===
+RUN_STATE_PATH = os.path.join("data", "run_state.json")
+PROGRESS_SAVE_WEIGHT = 0.05  # Save weight of one second of travel; a button press weighs 1
 
 
 # === Load Random Sprite Function ===
 def load_random_sprite(prefix, max_index):
-    index = random.randint(1, max_index)
-    path = os.path.join("sprites", f"{prefix}{index}.png")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Missing file: {path}")
-    return Image.open(path).convert("RGBA")
-
-# === Ship Builder ===
-def build_ship_image():
-    MODULE_WIDTH = 33
-    MODULE_HEIGHT = 30
-    ship = Image.new("RGBA", (MODULE_WIDTH * 3, MODULE_HEIGHT * 2))
-
-    base = load_random_sprite("base", 8)
-    ship.paste(base, (0, 0), base)
-
-    engine_top = load_random_sprite("engine", 9)
-    storage_top = load_random_sprite("storagetop", 9)
-    cabin = load_random_sprite("cabin", 21)
-    engine_bottom = load_random_sprite("engine", 10)
-    storage_bottom = load_random_sprite("storagebottom", 10)
-    gun = load_random_sprite("gun", 10)
-
-    ship.paste(engine_top, (0, 0), engine_top)
-    ship.paste(storage_top, (33, 0), storage_top)
-    ship.paste(cabin, (66, 0), cabin)
-    ship.paste(engine_bottom, (0, 30), engine_bottom)
-    ship.paste(storage_bottom, (33, 30), storage_bottom)
-    ship.paste(gun, (66, 30), gun)
-
-    # Optional overlays
-    logo = load_random_sprite("logo", 14)
-    wires = load_random_sprite("wires", 7)
-    pipes = load_random_sprite("pipes", 10)
-
-    ship.paste(logo, (0, 0), logo)
-    ship.paste(wires, (0, 0), wires)
-    ship.paste(pipes, (0, 0), pipes)
-
-    return ship
+    return sprite_registry.random(prefix, max_index)
+
+# === Input and Task Runtime ===
+buttons = InputQueue(display)
+runtime = Runtime()
+
+
+# === Preload: everything the intro and the game draw is prepared while the logo is up ===
+config = detect_display()
+event_cards = EventCards(config)
 
-# === Display Setup ===
-buffer = Image.new("RGBA", (WIDTH, HEIGHT))
-displayhat = dhm.DisplayHATMini(buffer.convert("RGB"))
 
-# === Show Intro Logo ===
-logo_path = os.path.join("sprites", "SpaceSim_logo_5.png")
-if os.path.exists(logo_path):
-    logo_image = Image.open(logo_path).convert("RGB").resize((WIDTH, HEIGHT))
-    displayhat.buffer = logo_image
-    displayhat.display()
-    time.sleep(2)
+def load_screen(name):
+    return sprites.get(name).resize((WIDTH, HEIGHT))
+
+
+def load_frames(prefix, count):
+    return [sprites.get(f"{prefix}{i}") for i in range(1, count + 1)]
+
+
+def load_game_over_screens():
+    """Game over screens stay resident so they show up the moment the ship is gone"""
+    if "gameover" not in sprites:
+        return None, None
+    screen = load_screen("gameover")
+    pressed = None
+    if "gameover2" in sprites:
+        # Optional overlay shown when A is pressed
+        overlay = load_screen("gameover2")
+        pressed = screen.copy()
+        pressed.paste(overlay, (0, 0), overlay)
+    return screen, pressed
+
+
+preloader.add("fonts", fonts.preload, [(None, None), (DEJAVU_SANS_BOLD, 16)])
+preloader.add("building_bg", load_screen, "buildingship")
+preloader.add("hud", load_screen, "hud")
+# Every part variant, so the flicker never waits on disk
+preloader.add("ship_parts", sprite_registry.preload, SHIP_PART_PREFIXES)
+preloader.add("explosion", load_frames, "exp", 6)
+preloader.add("flames", load_frames, "flame", 4)
+preloader.add("big_flames", load_frames, "flamebig", 4)
+preloader.add("game_over", load_game_over_screens)
+
+
+async def finish_logo():
+    # Readiness barrier: the logo stays up until every asset is ready, and at least SPLASH_SECONDS
+    splash_seconds = SPLASH_SECONDS if logo_shown else 0
+    await asyncio.gather(
+        runtime.sleep(max(0, splash_seconds - (time.time() - splash_start))),
+        preloader.wait(),
+    )
+
+runtime.run(finish_logo())
+preloader.close()
+timeline.mark("assets_ready")
+
+building_bg = preloader.get("building_bg")
+hud_overlay = preloader.get("hud")
+EXPLOSION_FRAMES = preloader.get("explosion")
+ENGINE_FLAME_FRAMES = preloader.get("flames")
+ENGINE_FLAME_BIG_FRAMES = preloader.get("big_flames")
+game_over, game_over_pressed = preloader.get("game_over")
 
 # === Ship Flicker Intro ===
 # === Progressive Ship Builder with Flickering ===
 
-# Load background
-building_bg_path = os.path.join("sprites", "buildingship.png")
-building_bg = Image.open(building_bg_path).convert("RGBA").resize((WIDTH, HEIGHT))
-
-# Load HUD overlay
-hud_overlay_path = os.path.join("sprites", "hud.png")
-hud_overlay = Image.open(hud_overlay_path).convert("RGBA").resize((WIDTH, HEIGHT))
-
-
-# Create placeholders
-parts = {
-    "base": None,
-    "engine_top": None,
-    "engine_bottom": None,
-    "storage_top": None,
-    "storage_bottom": None,
-    "gun": None,
-    "cabin": None,
-    "logo": None,
-    "pipes": None,
-    "wires": None,
-}
+
+# Ship parts bottom to top, with where each one sits on the ship
+ship_builder = ShipCompositor(SHIP_SIZE, [(slot, position) for slot, position, _, _ in SHIP_SLOTS])
+SHIP_PARTS = {slot: (prefix, variants) for slot, _, prefix, variants in SHIP_SLOTS}
+
+
+def part_loader(slot):
+    prefix, variants = SHIP_PARTS[slot]
+    return lambda: load_random_sprite(prefix, variants)
+
 
 # Renders the current ship-in-progress
 def render_build_state(message=None):
     buffer.paste(building_bg, (0, 0), building_bg)
-    ship = Image.new("RGBA", (99, 60))
-    if parts["base"]: ship.paste(parts["base"], (0, 0), parts["base"])
-    if parts["engine_top"]: ship.paste(parts["engine_top"], (0, 0), parts["engine_top"])
-    if parts["engine_bottom"]: ship.paste(parts["engine_bottom"], (0, 30), parts["engine_bottom"])
-    if parts["storage_top"]: ship.paste(parts["storage_top"], (33, 0), parts["storage_top"])
-    if parts["storage_bottom"]: ship.paste(parts["storage_bottom"], (33, 30), parts["storage_bottom"])
-    if parts["cabin"]: ship.paste(parts["cabin"], (66, 0), parts["cabin"])
-    if parts["gun"]: ship.paste(parts["gun"], (66, 30), parts["gun"])
-    if parts["logo"]: ship.paste(parts["logo"], (0, 0), parts["logo"])
-    if parts["pipes"]: ship.paste(parts["pipes"], (0, 0), parts["pipes"])
-    if parts["wires"]: ship.paste(parts["wires"], (0, 0), parts["wires"])
+    ship = ship_builder.image()
     x = (WIDTH - ship.width) // 2
     y = (HEIGHT - ship.height) // 2
     buffer.paste(ship, (x, y), ship)
 
     if message:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 16)  # Larger font
+        font = fonts.get(DEJAVU_SANS_BOLD, 16)  # Larger font
         draw = ImageDraw.Draw(buffer)
-        text_width = draw.textlength(message, font=font)
-        draw.text(((WIDTH - text_width) // 2, HEIGHT - 25), message, font=font, fill=(255, 255, 255))
+        text_width = fonts.metrics(font).textlength(message)
+        text_cache.draw(draw, ((WIDTH - text_width) // 2, HEIGHT - 25), message, font=font, fill=(255, 255, 255))
 
 
-    displayhat.buffer = buffer.convert("RGB")
-    displayhat.display()
+    presenter.present(framebuffer)
 
 
 # Flicker logic for each part
-def flicker_part(key, duration, loader_fn, message):
+async def flicker_part(key, duration, loader_fn, message):
     start = time.time()
     while time.time() - start < duration:
-        parts[key] = loader_fn()
+        ship_builder.set_part(key, loader_fn())
         render_build_state(message)
-        time.sleep(0.05)
+        await runtime.sleep(0.05)
 
 
 # Build ship step-by-step
 build_steps = [
-    ("base", 1.0, lambda: load_random_sprite("base", 8), "BUILDING STRUCTURE"),
-    ("engine_top", 1.0, lambda: load_random_sprite("engine", 9), "TUNING TOP ENGINE"),
-    ("engine_bottom", 1.0, lambda: load_random_sprite("engine", 10), "SPOOLING BOTTOM ENGINE"),
-    ("storage_top", 1.0, lambda: load_random_sprite("storagetop", 9), "BOLTING ON TOP STORAGE"),
-    ("storage_bottom", 1.0, lambda: load_random_sprite("storagebottom", 10), "GLUEING ON BOTTOM STORAGE"),
-    ("cabin", 1.0, lambda: load_random_sprite("cabin", 21), "PUTTING SEATS IN"),
-    ("gun", 1.0, lambda: load_random_sprite("gun", 10), "LOADING GUNS"),
-    ("logo", 1.0, lambda: load_random_sprite("logo", 14), "CUSTOMISATION"),
-    ("wires", 1.0, lambda: load_random_sprite("wires", 7), "WIRING ENGINE"),
-    ("pipes", 1.0, lambda: load_random_sprite("pipes", 10), "FINAL COOLING SYSTEMS"),
+    ("base", 1.0, part_loader("base"), "BUILDING STRUCTURE"),
+    ("engine_top", 1.0, part_loader("engine_top"), "TUNING TOP ENGINE"),
+    ("engine_bottom", 1.0, part_loader("engine_bottom"), "SPOOLING BOTTOM ENGINE"),
+    ("storage_top", 1.0, part_loader("storage_top"), "BOLTING ON TOP STORAGE"),
+    ("storage_bottom", 1.0, part_loader("storage_bottom"), "GLUEING ON BOTTOM STORAGE"),
+    ("cabin", 1.0, part_loader("cabin"), "PUTTING SEATS IN"),
+    ("gun", 1.0, part_loader("gun"), "LOADING GUNS"),
+    ("logo", 1.0, part_loader("logo"), "CUSTOMISATION"),
+    ("wires", 1.0, part_loader("wires"), "WIRING ENGINE"),
+    ("pipes", 1.0, part_loader("pipes"), "FINAL COOLING SYSTEMS"),
 ]
 
-for key, duration, loader_fn, message in build_steps:
-    flicker_part(key, duration, loader_fn, message)
+async def build_ship():
+    for key, duration, loader_fn, message in build_steps:
+        await flicker_part(key, duration, loader_fn, message)
 
-# Final launch message
-render_build_state("LAUNCHING")
-time.sleep(1.0)
+    # Final launch message
+    render_build_state("LAUNCHING")
+    await runtime.sleep(1.0)
 
+runtime.run(build_ship())
+timeline.mark("intro_done")
 
-# === Assemble final ship with proper coordinates
-final_ship = Image.new("RGBA", (99, 60))
-if parts["base"]: final_ship.paste(parts["base"], (0, 0), parts["base"])
-if parts["engine_top"]: final_ship.paste(parts["engine_top"], (0, 0), parts["engine_top"])
-if parts["engine_bottom"]: final_ship.paste(parts["engine_bottom"], (0, 30), parts["engine_bottom"])
-if parts["storage_top"]: final_ship.paste(parts["storage_top"], (33, 0), parts["storage_top"])
-if parts["storage_bottom"]: final_ship.paste(parts["storage_bottom"], (33, 30), parts["storage_bottom"])
-if parts["cabin"]: final_ship.paste(parts["cabin"], (66, 0), parts["cabin"])
-if parts["gun"]: final_ship.paste(parts["gun"], (66, 30), parts["gun"])
-if parts["logo"]: final_ship.paste(parts["logo"], (0, 0), parts["logo"])
-if parts["pipes"]: final_ship.paste(parts["pipes"], (0, 0), parts["pipes"])
-if parts["wires"]: final_ship.paste(parts["wires"], (0, 0), parts["wires"])
-
-spaceship_image = final_ship.copy()
-
-# === Engine Flame Offsets: behind top and bottom engines ===
-engine_flames = [
-    {'x_offset': -10, 'y_offset': 15},    # Behind top engine
-    {'x_offset': -10, 'y_offset': 45},   # Behind bottom engine
-]
 
+# === Assemble final ship with proper coordinates
+final_ship = ship_builder.image()
 
+# === Setup final ship image, it belongs to the run ===
+session = GameSession(final_ship.copy())
 
-# === Setup final ship image ===
-spaceship_image = final_ship.copy()
 
-def flash_and_explode():
-    global spaceship_image
+def centered(image):
+    return (WIDTH // 2 - image.width // 2, HEIGHT // 2 - image.height // 2)
 
-    # Create a white version of the ship for flashing
-    white_ship = spaceship_image.copy()
-    r, g, b, a = white_ship.split()
-    white_overlay = Image.new("RGBA", white_ship.size, (255, 255, 255, 255))
-    white_ship = Image.composite(white_overlay, spaceship_image, a)
 
+def bake_death_clip(ship):
+    """Prepare the flash and explosion shown on self-destruct, so playing it is only blits"""
+    white_ship = silhouette(ship)
+    clip = Clip()
     for _ in range(10):
-        # Flash white
-        buffer.paste((0, 0, 0), [0, 0, WIDTH, HEIGHT])
-        for s in stars:
-            draw.ellipse((s["x"], s["y"], s["x"] + 2, s["y"] + 2), fill=(255, 255, 255))
-        buffer.paste(white_ship, (WIDTH // 2 - white_ship.width // 2, HEIGHT // 2 - white_ship.height // 2), white_ship)
-        displayhat.buffer = buffer.convert("RGB")
-        displayhat.display()
-        time.sleep(0.05)
-
-        # Back to normal ship
-        buffer.paste((0, 0, 0), [0, 0, WIDTH, HEIGHT])
-        for s in stars:
-            draw.ellipse((s["x"], s["y"], s["x"] + 2, s["y"] + 2), fill=(255, 255, 255))
-        buffer.paste(spaceship_image, (WIDTH // 2 - spaceship_image.width // 2, HEIGHT // 2 - spaceship_image.height // 2), spaceship_image)
-        displayhat.buffer = buffer.convert("RGB")
-        displayhat.display()
-        time.sleep(0.05)
-
-    # Play explosion frames
+        clip.add(white_ship, centered(white_ship), 0.05)
+        clip.add(ship, centered(ship), 0.05)
     for frame in EXPLOSION_FRAMES:
-        buffer.paste((0, 0, 0), [0, 0, WIDTH, HEIGHT])
-        for s in stars:
-            draw.ellipse((s["x"], s["y"], s["x"] + 2, s["y"] + 2), fill=(255, 255, 255))
-        x = WIDTH // 2 - frame.width // 2
-        y = HEIGHT // 2 - frame.height // 2
-        buffer.paste(frame, (x, y), frame)
-        displayhat.buffer = buffer.convert("RGB")
-        displayhat.display()
-        time.sleep(0.08)
-
-    # Remove ship after explosion
-    spaceship_image = Image.new("RGBA", spaceship_image.size, (0, 0, 0, 0))
-
-    # Load and show game over image
-    game_over_path = os.path.join("sprites", "gameover.png")
-    if os.path.exists(game_over_path):
-        game_over = Image.open(game_over_path).convert("RGBA").resize((WIDTH, HEIGHT))
-        displayhat.buffer = game_over.convert("RGB")
-        displayhat.display()
-
-    # Load optional overlay image to show when A is pressed
-    game_over2_path = os.path.join("sprites", "gameover2.png")
-    game_over2 = None
-    if os.path.exists(game_over2_path):
-        game_over2 = Image.open(game_over2_path).convert("RGBA").resize((WIDTH, HEIGHT))
-
-    # Wait for A to restart, show visual feedback if pressed
-    while True:
-        if displayhat.read_button(displayhat.BUTTON_A):
-            # Show overlay
-            if game_over2:
-                combined = game_over.copy()
-                combined.paste(game_over2, (0, 0), game_over2)
-                displayhat.buffer = combined.convert("RGB")
-                displayhat.display()
-            # Debounce and restart
-            while displayhat.read_button(displayhat.BUTTON_A):
-                time.sleep(0.05)
-            os.execv(sys.executable, [sys.executable] + sys.argv)
-        time.sleep(0.1)
+        clip.add(frame, centered(frame), 0.08)
+    return clip
+
+
+death_clip = bake_death_clip(session.ship_image)
+
+async def flash_and_explode():
+    # Holding the frame lock stops the simulation and rendering until the restart
+    async with frame_lock:
+        # The run is over from the moment the ship blows up, a power cut from here on must not bring it back
+        session.over = True
+        state_store.clear()
+
+        # The stars hold still while the ship blows up
+        sky = Canvas(WIDTH, HEIGHT, (0, 0, 0, 255))
+        starfield.draw(sky.pixels)
+        await runtime.run_blocking("render", death_clip.play, framebuffer, sky, presenter)
+
+        # Remove ship after explosion
+        session.ship_image = Image.new("RGBA", session.ship_image.size, (0, 0, 0, 0))
+        compositor.invalidate("ship")
+
+        # Show game over image
+        if game_over:
+            buffer.paste(game_over)
+            presenter.present(framebuffer)
+
+        # Wait for A to be pressed and let go, showing visual feedback while it is down.
+        # A quick tap can bring the press and the release in the same poll.
+        buttons.clear()
+        a_down = False
+        restart = False
+        while not restart:
+            for event in buttons.poll():
+                if event.button != display.BUTTON_A:
+                    continue
+                if event.kind == PRESS and not a_down:
+                    a_down = True
+                    # Show overlay
+                    if game_over_pressed:
+                        buffer.paste(game_over_pressed)
+                        presenter.present(framebuffer)
+                elif event.kind == RELEASE and a_down:
+                    restart = True
+                    break
+            if not restart:
+                await runtime.sleep(0.05 if a_down else 0.1)
+        start_run(build_new_ship())
+
+
+def build_new_ship():
+    """Pick a random part for every slot at once, without the flicker intro"""
+    for key, _, loader_fn, _ in build_steps:
+        ship_builder.set_part(key, loader_fn())
+    return ship_builder.image().copy()
+
+
+def start_run(ship):
+    """
+    Reset the session for a new run, keeping sprites, fonts, caches and the display
+
+    Called with the frame lock held, the first frame after it redraws everything.
+    """
+    global death_clip, last_status_key, card_was_visible, last_suspended
+    if boost_timer:
+        boost_timer.cancel()
+    # Time asleep on the game over screen is not a gap to catch up on
+    last_suspended = None
+    session.reset(ship)
+    death_clip = bake_death_clip(ship)
+    compositor.invalidate("ship")
+    hud_texts.clear()
+    last_status_key = None
+    card_was_visible = False
+    damage.add_full()
 
 
+# === Game Setup ===
+starfield = Starfield(WIDTH, HEIGHT, STAR_LAYERS)
+font = fonts.get()
+
+
+def snapshot_run_state():
+    run_state = session.snapshot()
+    run_state["saved_at"] = time.time()
+    return run_state
+
+
+# === Timers: everything periodic runs off the simulation clock, nothing checks the time each frame ===
+timers = TimerWheel(tick=SIM_TICK)
+boost_timer = None
+
+
+def start_boost(seconds):
+    global boost_timer
+    session.boost_active = True
+    boost_timer = timers.schedule(seconds, end_boost)
+
+
+def end_boost():
+    session.boost_active = False
+
+
+# === Offline Catch-up: the run carries on while the device is off or asleep ===
+OFFLINE_GAP = 1.0  # Seconds asleep before they are credited
+GAP_CHECK_INTERVAL = 1.0
+last_suspended = None
+
+
+def catch_up(seconds, boost_left):
+    """
+    Credit seconds spent with nothing running in one step, and re-arm the boost timer
+
+    Args:
+        seconds: Time away
+        boost_left: Boost seconds that were left when the time away began
+
+    Returns:
+        OfflineProgress: What the time added up to
+    """
+    global boost_timer
+    progress = offline_progress(seconds, SIM_TICK_RATE, boost_left, boost_multiplier=4,
+                                event_interval=EVENT_MEAN_INTERVAL)
+    session.distance_covered += round(progress.distance)
+    state_store.mark_dirty(seconds * PROGRESS_SAVE_WEIGHT)
+    if session.boost_active:
+        # The boost timer runs on simulation time, which stood still
+        if boost_timer:
+            boost_timer.cancel()
+            boost_timer = None
+        if progress.boost_left > 0:
+            session.boost_end_time = time.time() + progress.boost_left
+            start_boost(progress.boost_left)
+        else:
+            end_boost()
+    return progress
+
+
+def watch_for_gaps():
+    # Suspend stops the simulation clock; the boot clock keeps counting and the wall clock can jump, so only
+    # the boot clock's lead over the monotonic clock is time away
+    global last_suspended
+    suspended = suspended_time()
+    if last_suspended is None:
+        last_suspended = suspended
+    elif suspended - last_suspended > OFFLINE_GAP:
+        boost_left = timers.remaining(boost_timer) if session.boost_active and boost_timer else 0
+        progress = catch_up(suspended - last_suspended, boost_left)
+        if random.random() < progress.event_chance:
+            event_scheduler.start(0)
+        last_suspended = suspended
+
+
+state_store = StateStore(RUN_STATE_PATH, snapshot_run_state)
+saved_run = state_store.load()
+offline_event = False
+if saved_run:
+    try:
+        session.restore(saved_run)
+        saved_at = saved_run.get("saved_at", time.time())
+        # Boost time left is measured against the save's own clock, not one that may have stepped since
+        progress = catch_up(time_away(saved_at), session.boost_end_time - saved_at if session.boost_active else 0)
+        # An event that came up while away is waiting on the first tick
+        offline_event = random.random() < progress.event_chance
+    except (AttributeError, TypeError, ValueError) as e:
+        # Left in place, a save this version cannot read would stop every boot here
+        print(f"Error restoring saved run, starting a new one: {e}")
+        state_store.clear()
+        session.reset(session.ship_image)
+
+status_bar = StatusBar(config, 1, session.boost_active, session.boost_points, session.repair_points,
+                       session.damaged_systems, session.distance_covered)
+status_bar.schedule(timers)
+button_bar = ButtonBar(config, session.boost_points, session.boost_active, session.repair_points,
+                       len(session.damaged_systems), False)
+
+# === Damage Tracking ===
+# The status bar owns the bottom strip, everything above it is the playfield
+PLAYFIELD_HEIGHT = HEIGHT - status_bar.height
+STATUS_BOX = (0, PLAYFIELD_HEIGHT, WIDTH, HEIGHT)
+
+SHIP_X, SHIP_Y = ship_position(session.ship_image)
+FLAME_X = SHIP_X + FLAME_OFFSET[0]
+FLAME_Y = SHIP_Y + FLAME_OFFSET[1]
+FLAME_BOX = sprite_box(ENGINE_FLAME_FRAMES + ENGINE_FLAME_BIG_FRAMES, FLAME_X, FLAME_Y)
+
+damage = DamageTracker(WIDTH, HEIGHT)
+draw = ImageDraw.Draw(buffer)
+hud_texts = {}
+last_status_key = None
+card_was_visible = False
+
+
+def set_hud_text(slot, text, position, color):
+    """Place a HUD string and damage its old and new boxes if it changed"""
+    box = draw.textbbox(position, text, font=font)
+    previous = hud_texts.get(slot)
+    if previous and previous[0] == text and previous[1] == position:
+        return
+    if previous:
+        damage.add(previous[3])
+    damage.add(box)
+    hud_texts[slot] = (text, position, color, box)
 
 
+# === Layers, bottom to top ===
+def render_stars(canvas, box, state):
+    x0, y0, x1, y1 = box
+    starfield.draw(canvas.pixels[y0:y1, x0:x1], (x0, y0))
 
-# === Convert static image to draw-friendly format ===
-def get_ship_image():
-    return spaceship_image
 
-# === Game Setup ===
-from game.display_config import detect_display
-from game.sprites import Spaceship
+def render_ship(canvas, box, state):
+    blit(canvas.image, session.ship_image, (SHIP_X, SHIP_Y))
+
+
+def render_lights(canvas, box, flash_state):
+    lights_draw = ImageDraw.Draw(canvas.image)
+    for light in AMBIENT_LIGHTS:
+        draw_light(lights_draw, light, flash_state)
 
-config = detect_display()
-spaceship = Spaceship(x=WIDTH // 2, y=HEIGHT // 2, ship_data={"speed": 1})
-stars = [{"x": random.randint(0, WIDTH), "y": random.randint(0, HEIGHT)} for _ in range(50)]
-
-# === Fixed ambient lights: 2 green (front), 2 red (back) ===
-ambient_lights = [
-    {'x': WIDTH // 2 - 40, 'y': HEIGHT // 2 - 10, 'type': 'red', 'shape': 'circle'},
-    {'x': WIDTH // 2 - 20, 'y': HEIGHT // 2 - 5, 'type': 'red', 'shape': 'circle'},
-    {'x': WIDTH // 2 + 20, 'y': HEIGHT // 2 + 5, 'type': 'green', 'shape': 'circle'},
-    {'x': WIDTH // 2 + 35, 'y': HEIGHT // 2 + 10, 'type': 'green', 'shape': 'circle'},
-]
-light_flash_state = True
-light_flash_timer = 0
 
+def render_flames(canvas, box, state):
+    boosted, flame_index = state
+    flame_image = (ENGINE_FLAME_BIG_FRAMES if boosted else ENGINE_FLAME_FRAMES)[flame_index]
+    blit(canvas.image, flame_image, (FLAME_X, FLAME_Y))
 
-engine_flame_index = 0
-last_flame_index = -1  # Used to track the previous flame frame
 
-boost_active = False
-boost_points = 10
-boost_end_time = 0
-distance_covered = 0
-repair_points = 2
-damaged_systems = []
-current_event = None
-font = ImageFont.load_default()
+def render_hud(canvas, box, state):
+    blit(canvas.image, hud_overlay, (0, 0))
+
+
+def render_text(canvas, box, texts):
+    # Colour the cached coverage mask so anti-aliased edges keep their colour
+    for text, (x, y), color in texts:
+        mask, (dx, dy) = text_cache.mask(text, font, (math.modf(x)[0], math.modf(y)[0]))
+        glyphs = Image.new("RGBA", mask.size, color)
+        glyphs.putalpha(mask)
+        blit(canvas.image, glyphs, (int(x) + dx, int(y) + dy))
+
+
+compositor = LayerCompositor(WIDTH, HEIGHT)
+compositor.add_layer("stars", render_stars, dynamic=True)
+compositor.add_layer("ship", render_ship)
+compositor.add_layer("lights", render_lights, max_variants=2)
+compositor.add_layer("flames", render_flames)
+compositor.add_layer("hud", render_hud)
+compositor.add_layer("text", render_text)
+
+
+def compose_region(box):
+    """Recomposite the playfield inside box, in place in the framebuffer"""
+    x0, y0, x1, y1 = box[0], box[1], box[2], min(box[3], PLAYFIELD_HEIGHT)
+    if y0 >= y1:
+        return
+    framebuffer.clear((x0, y0, x1, y1))
+    compositor.compose(framebuffer, (x0, y0, x1, y1))
 
-status_bar = StatusBar(config, 1, boost_active, boost_points, repair_points, damaged_systems, distance_covered)
-button_bar = ButtonBar(config, boost_points, boost_active, repair_points, len(damaged_systems), False)
-event_display = None
 
 # === Button Input ===
 def on_button(index):
-    global boost_active, boost_points, repair_points, damaged_systems, current_event, boost_end_time
-    if current_event and current_event.options:
-        choice = current_event.options[index] if index < len(current_event.options) else None
+    state_store.mark_dirty()
+    if session.current_event and session.current_event.options:
+        options = session.current_event.options
+        choice = options[index] if index < len(options) else None
         if choice:
-            if random.randint(1, 100) <= choice.get("success_rate", 100):
-                boost_points += 1
-        current_event = None
+            if random.randint(1, 100) <= choice.success_rate:
+                session.boost_points += 1
+        session.current_event = None
         return
-    if index == 0 and boost_points > 0 and not boost_active:
-        boost_active = True
-        boost_end_time = time.time() + boost_points
-        boost_points = 0
-    elif index == 1 and repair_points > 0 and damaged_systems:
-        repair_points -= 1
-        damaged_systems = []
+    if index == 0 and session.boost_points > 0 and not session.boost_active:
+        # Each boost point is worth a second of boost
+        session.boost_end_time = time.time() + session.boost_points
+        start_boost(session.boost_points)
+        session.boost_points = 0
+    elif index == 1 and session.repair_points > 0 and session.damaged_systems:
+        session.repair_points -= 1
+        session.damaged_systems = []
 
-# === Main Game Loop ===
-try:
-    last_time = time.time()
-    while True:
-        now = time.time()
-        # Flash toggle logic (e.g. every 0.5s at 6fps = 3 frames)
-        light_flash_timer += 1
-        if light_flash_timer >= 3:
-            light_flash_state = not light_flash_state
-            light_flash_timer = 0
-
-        dt = now - last_time
-        last_time = now
-
-        speed = 4 if boost_active else 1
-        distance_covered += speed
-        if boost_active and now >= boost_end_time:
-            boost_active = False
-
-        for s in stars:
-            s["x"] -= speed
-            if s["x"] < 0:
-                s["x"] = WIDTH
-                s["y"] = random.randint(0, HEIGHT)
-
-        if not boost_active and current_event is None and random.random() < 0.0002:
-            current_event = get_random_event()
-            event_display = EventDisplay(config, current_event)
+# === Frame Statistics ===
+# SPACEPILOT_STATS=1 starts with the overlay on, SPACEPILOT_STATS_FILE is written on exit
+# The frame budget follows the target frame rate, see set_target_fps()
+stats = Instrumentation(enabled=bool(os.environ.get("SPACEPILOT_STATS")))
+STATS_PATH = os.environ.get("SPACEPILOT_STATS_FILE")
+STARTUP_PATH = os.environ.get("SPACEPILOT_STARTUP_FILE")  # Startup timelines are appended here
+STATS_OVERLAY_INTERVAL = 0.5  # Seconds between overlay refreshes, each one redraws the status bar
 
-        draw = ImageDraw.Draw(buffer)
-        draw.rectangle((0, 0, WIDTH, HEIGHT), fill=COLOR_BLACK)
-        for s in stars:
-            draw.ellipse((s["x"], s["y"], s["x"] + 2, s["y"] + 2), fill=(255, 255, 255))
 
-        # Draw static ship
-        buffer.paste(spaceship_image, (WIDTH // 2 - spaceship_image.width // 2, HEIGHT // 2 - spaceship_image.height // 2), spaceship_image)
-        
-        # === Ambient Ship Lights Flicker ===
-        ambient_draw = ImageDraw.Draw(buffer)
+def update_stats_overlay():
+    status_bar.overlay = stats.overlay_text() if stats.enabled else None
+
+
+def set_target_fps(fps):
+    """Render fps frames a second, without changing the simulation speed"""
+    runtime.set_interval("render", 1.0 / fps)
+    stats.frame_budget = 1.0 / fps
+
+
+def stats_summary():
+    stats.counters["presented"] = presenter.presented
+    stats.counters["coalesced"] = presenter.coalesced
+    summary = stats.summary()
+    summary["target_fps"] = 1.0 / runtime.intervals["render"]
+    summary["achieved_fps"] = runtime.rate("render")
+    return summary
+
 
-        for light in ambient_lights:
-            x, y = light['x'], light['y']
-            flicker_type = light['type']
-            shape = light['shape']
+def dump_stats():
+    if STATS_PATH:
+        stats.dump(STATS_PATH, stats_summary())
 
-            # Flicker between ON and OFF shades
-            if flicker_type == 'red':
-                color = (255, 50, 50) if light_flash_state else (100, 0, 0)
-            elif flicker_type == 'green':
-                color = (50, 255, 50) if light_flash_state else (0, 100, 0)
-            if shape == 'circle':
-                ambient_draw.ellipse((x, y, x+2, y+2), fill=color)
-            else:
-                ambient_draw.line((x, y, x + 3, y), fill=color, width=1)
 
+async def save_stats():
+    # Summarise here, only the file write goes to the I/O thread
+    if STATS_PATH:
+        await runtime.run_blocking("io", stats.dump, STATS_PATH, stats_summary())
 
 
-        # === Draw engine flame frame behind ship (normal vs boost) ===
-        current_frames = ENGINE_FLAME_BIG_FRAMES if boost_active else ENGINE_FLAME_FRAMES
+# === Tasks: simulation, rendering, input and saving run side by side ===
+STATS_SAVE_INTERVAL = 10.0
+STATE_CHECK_INTERVAL = 1.0  # Seconds between checks whether the run should be saved
+# Held while the simulation ticks and while a frame is drawn, so the render thread never sees a half-done tick
+frame_lock = asyncio.Lock()
+last_tick_time = None
+card_visible = False
 
-        while True:
-            flame_index = random.randint(0, len(current_frames) - 1)
-            if flame_index != last_flame_index:
-                break
-        last_flame_index = flame_index
 
-        flame_image = current_frames[flame_index]
-        fx = WIDTH // 2 - spaceship_image.width // 2 - 99
-        fy = HEIGHT // 2 - spaceship_image.height // 2
-        buffer.paste(flame_image, (fx, fy), flame_image)
+async def simulate():
+    global last_tick_time
+    async with frame_lock:
+        with stats.span("simulate"):
+            timers.advance()
 
+            speed = 4 if session.boost_active else 1
+            session.distance_covered += speed
 
+            starfield.step(speed)
+            last_tick_time = runtime.clock()
+            state_store.mark_dirty(SIM_TICK * PROGRESS_SAVE_WEIGHT)
 
 
+def toggle_lights():
+    session.light_flash_state = not session.light_flash_state
+    for light in AMBIENT_LIGHTS:
+        damage.add((light['x'], light['y'], light['x'] + 4, light['y'] + 3))
 
 
-        # Overlay the HUD (before text)     
-        buffer.paste(hud_overlay, (0, 0), hud_overlay)
+upcoming_event = None
 
 
-        draw.text((25, 10), f"Boost: {'ACTIVE' if boost_active else boost_points}", font=font, fill=COLOR_GREEN)
-        repair_text = f"{repair_points} :Repair"
-        text_width = draw.textlength(repair_text, font=font)
-        draw.text((WIDTH - text_width - 25, 10), repair_text, font=font, fill=COLOR_RED)
+def draw_upcoming_event():
+    # Pick the next event when its time is drawn and draw its card on the render thread meanwhile
+    global upcoming_event
+    if upcoming_event is None:
+        upcoming_event = get_random_event()
+        runtime.executor("render").submit(event_cards.prepare, upcoming_event)
 
-        if current_event and event_display:
-            draw.rectangle((0, 0, WIDTH, HEIGHT), fill=COLOR_BLACK)
-            event_display.draw(draw)
 
-        status_bar.update(1, boost_active, boost_points, repair_points, damaged_systems, distance_covered)
-        button_bar.update(boost_points, boost_active, repair_points, len(damaged_systems), current_event is not None)
-        status_bar.draw(draw)
-        button_bar.draw(draw)
+def open_event():
+    # An event due during a boost or while another is open is dropped, the next time is already drawn
+    global upcoming_event
+    if session.boost_active or session.current_event is not None:
+        return False
+    session.current_event = upcoming_event or get_random_event()
+    session.event_display = event_cards.display(session.current_event)
+    upcoming_event = None
 
-        if displayhat.read_button(displayhat.BUTTON_A):
-            on_button(0)
-            while displayhat.read_button(displayhat.BUTTON_A): time.sleep(0.05)
-        if displayhat.read_button(displayhat.BUTTON_X):
-            on_button(1)
-            while displayhat.read_button(displayhat.BUTTON_X): time.sleep(0.05)            
-        if displayhat.read_button(displayhat.BUTTON_Y):
-            flash_and_explode()
-            while displayhat.read_button(displayhat.BUTTON_Y): time.sleep(0.05)
 
-        displayhat.buffer = buffer.convert("RGB")
-        displayhat.display()
-        time.sleep(0.03)
+def update_scene():
+    # Draw the stars part way to their next tick so motion stays smooth between ticks
+    alpha = min(1.0, (runtime.clock() - last_tick_time) / SIM_TICK) if last_tick_time else 1.0
+    starfield.interpolate(alpha)
+    damage.add_boxes(*starfield.damage_boxes())
+
+    # === Draw engine flame frame behind ship (normal vs boost) ===
+    current_frames = ENGINE_FLAME_BIG_FRAMES if session.boost_active else ENGINE_FLAME_FRAMES
+
+    while True:
+        flame_index = random.randint(0, len(current_frames) - 1)
+        if flame_index != session.last_flame_index:
+            break
+    session.last_flame_index = flame_index
+
+    compositor.set_state("flames", (session.boost_active, flame_index))
+    if FLAME_BOX:
+        damage.add(FLAME_BOX)
+
+    boost_text = f"Boost: {'ACTIVE' if session.boost_active else session.boost_points}"
+    set_hud_text("boost", boost_text, (25, 10), COLOR_GREEN)
+    repair_text = f"{session.repair_points} :Repair"
+    text_width = fonts.metrics(font).textlength(repair_text)
+    set_hud_text("repair", repair_text, (WIDTH - text_width - 25, 10), COLOR_RED)
+    compositor.set_state("text", tuple(entry[:3] for entry in hud_texts.values()))
+    compositor.set_state("lights", session.light_flash_state)
+
+    status_bar.update(1, session.boost_active, session.boost_points, session.repair_points,
+                      session.damaged_systems, session.distance_covered)
+    button_bar.update(session.boost_points, session.boost_active, session.repair_points,
+                      len(session.damaged_systems), session.current_event is not None)
+
+
+def compose_frame(regions, card):
+    """Draw the damaged regions into the framebuffer, runs on the render thread"""
+    with stats.span("compose"):
+        if card:
+            if regions is None:
+                buffer.paste(card.render())
+        else:
+            for box in regions if regions is not None else [(0, 0, WIDTH, HEIGHT)]:
+                compose_region(box)
+
+    with stats.span("status_bar"):
+        if regions is None or any(box[3] > PLAYFIELD_HEIGHT for box in regions):
+            status_bar.draw(draw)
+            button_bar.draw(draw)
+
+
+async def render_frame():
+    global card_visible, card_was_visible, last_status_key
+    async with frame_lock:
+        stats.begin_frame()
+        with stats.span("scene"):
+            update_scene()
+
+        # The event card covers the playfield, so only its open/close needs a full push
+        card_visible = session.current_event is not None and session.event_display is not None
+        if card_visible != card_was_visible:
+            damage.add_full()
+            card_was_visible = card_visible
+        elif card_visible:
+            # Only the status bar can change while the card is up
+            damage.clear()
+
+        status_key = status_bar.render_key()
+        if status_key != last_status_key:
+            damage.add(STATUS_BOX)
+            last_status_key = status_key
+
+        regions = damage.regions()
+        # PIL drawing releases the GIL, input and saving carry on meanwhile
+        await runtime.run_blocking("render", compose_frame, regions, session.event_display if card_visible else None)
+
+        # The presenter thread does the SPI transfer, this only queues the frame
+        with stats.span("present"):
+            presenter.present(framebuffer, regions)
+        if "interactive" not in timeline.marks:
+            timeline.mark("interactive")
+            timeline.finish(STARTUP_PATH)
+        if regions is None:
+            stats.count("full_frames")
+        else:
+            stats.count("regions", len(regions))
+        damage.clear()
+        stats.end_frame()
+
+
+async def handle_input():
+    # Button edges wake this task, it only polls while a backend or a held button needs it
+    wake = asyncio.Event()
+    buttons.add_listener(lambda: runtime.loop.call_soon_threadsafe(wake.set))
+    while True:
+        try:
+            await asyncio.wait_for(wake.wait(), buttons.next_poll())
+        except asyncio.TimeoutError:
+            pass
+        wake.clear()
+        for button in buttons.presses():
+            if button == display.BUTTON_A:
+                on_button(0)
+            elif button == display.BUTTON_X:
+                on_button(1)
+            elif button == display.BUTTON_Y:
+                await flash_and_explode()
+            elif button == display.BUTTON_B:
+                # B shows or hides the frame statistics
+                stats.toggle()
+
+
+# === Main Game Loop ===
+timers.every(LIGHT_FLASH_INTERVAL, toggle_lights)
+timers.every(STATE_CHECK_INTERVAL, state_store.maybe_save)
+timers.every(STATS_OVERLAY_INTERVAL, update_stats_overlay)
+timers.every(GAP_CHECK_INTERVAL, watch_for_gaps)
+event_scheduler = EventScheduler(timers, EVENT_MEAN_INTERVAL, open_event, prepare=draw_upcoming_event)
+event_scheduler.start(0 if offline_event else None)
+
+runtime.every("simulate", SIM_TICK, simulate, catch_up=5)
+runtime.every("render", 1.0 / TARGET_FPS, render_frame)
+set_target_fps(TARGET_FPS)
+runtime.every("stats", STATS_SAVE_INTERVAL, save_stats)
+runtime.spawn("input", handle_input())
+try:
+    runtime.run()
 
 except KeyboardInterrupt:
+    runtime.close()
+    if not session.over:
+        state_store.save()
+    state_store.close()
+    presenter.close()
+    display.close()
+    dump_stats()
     print("Exiting cleanly.")
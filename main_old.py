@@ -9,7 +9,6 @@ os.environ["SDL_VIDEODRIVER"] = "fbcon"
 os.environ["SDL_FBDEV"] = "/dev/fb0"
 
 import sys
-import json
 import time
 import pygame
 from pygame.locals import *
@@ -22,6 +21,18 @@ from game.display_config import detect_display, DisplayConfig
 from game.sprites import Spaceship
 from game.ui import StatusBar, EventDisplay, ButtonBar, MilestoneDisplay
 from game.gpio_handler import GPIOHandler
+from game.starfield import Starfield, StarLayer
+from game.persistence import StateStore
+from game.scheduler import TimerWheel, EventScheduler, fixed
+from game.offline import offline_progress, suspended_time, time_away
+
+GAME_STATE_PATH = os.path.join("data", "game_state.json")
+# Save weight of one second of idle travel; a button press or event weighs 1
+PROGRESS_SAVE_WEIGHT = 0.05
+BOOST_SPEED_MULTIPLIER = 2
+DARK_MATTER_RATE = 0.1  # Passive collection per second
+# Seconds asleep before they are credited
+OFFLINE_GAP = 1.0
 
 # Initialize pygame
 pygame.init()
@@ -102,13 +113,28 @@ class IdleSpaceAdventure:
         # Initialize star field
         self.init_stars()
         
-        # Load game state from file
+        # Load game state from file, later saves are written in the background
+        self.state_store = StateStore(GAME_STATE_PATH, self.snapshot_game_state)
         self.load_game_state()
         
-        # Set initial time for event generation
-        self.last_update_time = time.time()
-        self.last_save_time = time.time()
-        self.last_event_time = time.time()
+        # Progress runs on the monotonic clock, which neither counts suspend nor jumps when the wall clock is set
+        self.last_update_time = time.monotonic()
+        self.last_suspended = suspended_time()
+
+        # Timers run on game time since launch, advanced from update()
+        self.timers = TimerWheel()
+        self.timer_origin = self.last_update_time
+        self.status_bar.schedule(self.timers)
+        self.boost_timer = None
+        self.event_scheduler = EventScheduler(self.timers, EVENT_INTERVAL / 1000, self.open_event, distribution=fixed)
+
+        # Credit the time the game was off, which also arms the boost and event timers. Wall-clock
+        # times are only compared with others from the same save, or bounded by time_away()
+        now = time.time()
+        saved_at = self.game_state.get("saved_at", now)
+        boost_left = self.game_state["boost_end_time"] - saved_at if self.game_state["boost_active"] else 0
+        since_last_event = time_away(self.game_state["last_event_time"], now)
+        self.catch_up(time_away(saved_at, now), boost_left, max(0, EVENT_INTERVAL / 1000 - since_last_event))
         
     def init_game_state(self):
         """Initialize default game state"""
@@ -192,78 +218,47 @@ class IdleSpaceAdventure:
         
     def init_stars(self):
         """Initialize star field backgrounds"""
-        # Create stars for different parallax layers
-        self.small_stars = []
-        self.medium_stars = []
-        self.large_stars = []
-        
         # Number of stars in each layer (reduced for Display HAT Mini)
         small_count = 20 if self.display_config.is_display_hat_mini else 50
         medium_count = 10 if self.display_config.is_display_hat_mini else 25
         large_count = 0 if self.display_config.is_display_hat_mini else 15
-        
-        # Generate random star positions
-        for _ in range(small_count):
-            x = pygame.time.get_ticks() % self.display_config.width
-            y = pygame.time.get_ticks() % self.display_config.height
-            self.small_stars.append({
-                'pos': [x, y],
-                'speed': 0.2,
-                'size': 1,
-                'color': (200, 200, 200)
-            })
-            
-        for _ in range(medium_count):
-            x = pygame.time.get_ticks() % self.display_config.width
-            y = pygame.time.get_ticks() % self.display_config.height
-            self.medium_stars.append({
-                'pos': [x, y],
-                'speed': 0.5,
-                'size': 2,
-                'color': (230, 230, 255)
-            })
-            
-        for _ in range(large_count):
-            x = pygame.time.get_ticks() % self.display_config.width
-            y = pygame.time.get_ticks() % self.display_config.height
-            self.large_stars.append({
-                'pos': [x, y],
-                'speed': 1.0,
-                'size': 3,
-                'color': (255, 255, 255)
-            })
-            
-    def save_game_state(self):
-        """Save the current game state to a file"""
-        # Create data directory if it doesn't exist
-        if not os.path.exists('data'):
-            os.makedirs('data')
+
+        # Parallax layers, back to front; sizes match the old circle radii 1, 2 and 3
+        self.starfield = Starfield(
+            self.display_config.width,
+            self.display_config.height,
+            [
+                StarLayer(small_count, speed=0.2, size=3, color=(200, 200, 200)),
+                StarLayer(medium_count, speed=0.5, size=5, color=(230, 230, 255)),
+                StarLayer(large_count, speed=1.0, size=7, color=(255, 255, 255)),
+            ],
+        )
             
+    def snapshot_game_state(self):
+        """Get the game state as it is saved"""
         # Remove active event before saving
         save_state = self.game_state.copy()
         save_state['active_event'] = None
-        
-        # Save to file
-        with open('data/game_state.json', 'w') as f:
-            json.dump(save_state, f)
+        save_state['saved_at'] = time.time()
+        return save_state
+
+    def save_game_state(self):
+        """Queue the current game state for the background writer"""
+        self.state_store.save()
             
     def load_game_state(self):
         """Load game state from a file if available"""
-        try:
-            if os.path.exists('data/game_state.json'):
-                with open('data/game_state.json', 'r') as f:
-                    loaded_state = json.load(f)
-                    # Update the current state with loaded values
-                    self.game_state.update(loaded_state)
-                    # Update spaceship with loaded state
-                    self.spaceship.update_state(
-                        self.game_state["ship"],
-                        self.game_state["damaged_systems"],
-                        self.game_state["boost_active"]
-                    )
-                    print("Game state loaded successfully")
-        except Exception as e:
-            print(f"Error loading game state: {e}")
+        loaded_state = self.state_store.load()
+        if loaded_state:
+            # Update the current state with loaded values
+            self.game_state.update(loaded_state)
+            # Update spaceship with loaded state
+            self.spaceship.update_state(
+                self.game_state["ship"],
+                self.game_state["damaged_systems"],
+                self.game_state["boost_active"]
+            )
+            print("Game state loaded successfully")
             
     def handle_button_press(self, button_index):
         """Handle button presses from GPIO or keyboard"""
@@ -279,10 +274,9 @@ class IdleSpaceAdventure:
                 if (self.game_state["boost_points"] > 0 and 
                         not self.game_state["boost_active"]):
                     # Activate boost
-                    self.game_state["boost_active"] = True
                     self.game_state["boost_end_time"] = time.time() + BOOST_DURATION / 1000
+                    self.start_boost(BOOST_DURATION / 1000)
                     self.game_state["boost_points"] -= 1
-                    self.spaceship.set_boost(True)
             elif button_index == 1:  # REPAIR
                 if (self.game_state["repair_points"] > 0 and 
                         len(self.game_state["damaged_systems"]) > 0):
@@ -290,6 +284,7 @@ class IdleSpaceAdventure:
                     self.game_state["damaged_systems"].pop()
                     self.game_state["repair_points"] -= 1
                     self.spaceship.update_damaged_systems(self.game_state["damaged_systems"])
+        self.state_store.mark_dirty()
                     
         # Update the button display
         self.button_bar.update(
@@ -311,18 +306,18 @@ class IdleSpaceAdventure:
         if is_yes and event.options and len(event.options) > 0:
             # Apply "Yes" option effects
             option = event.options[0]
-            self.game_state["dark_matter"] += option["dark_matter_reward"]
-            self.game_state["distance"] += option["distance_effect"]
+            self.game_state["dark_matter"] += option.dark_matter_reward
+            self.game_state["distance"] += option.distance_effect
             
             # Add part reward if available
-            if "part_reward" in option and option["part_reward"]:
+            if option.part_reward:
                 pass  # Would handle part upgrades here
                 
         elif not is_yes and event.options and len(event.options) > 1:
             # Apply "No" option effects
             option = event.options[1]
-            self.game_state["dark_matter"] += option["dark_matter_reward"]
-            self.game_state["distance"] += option["distance_effect"]
+            self.game_state["dark_matter"] += option.dark_matter_reward
+            self.game_state["distance"] += option.distance_effect
             
         # Mark event as resolved and add to history
         event.resolved = True
@@ -334,6 +329,7 @@ class IdleSpaceAdventure:
         # Clear active event
         self.game_state["active_event"] = None
         self.event_display = None
+        self.state_store.mark_dirty()
                     
     def update_ship_stats(self):
         """Update ship statistics based on part levels"""
@@ -400,94 +396,127 @@ class IdleSpaceAdventure:
             
     def show_milestone(self, milestone_name):
         """Show a milestone notification"""
+        self.state_store.mark_dirty()
         self.milestone_display = MilestoneDisplay(
             self.display_config,
             milestone_name
         )
         
-    def process_event_generation(self):
-        """Check if it's time to generate a new event"""
-        now = time.time()
-        
-        # Only generate events if no active event
-        if (self.game_state["active_event"] is None and 
-                now - self.game_state["last_event_time"] >= EVENT_INTERVAL / 1000):
-            # Generate new event
-            new_event = self.event_generator.generate_event()
-            
-            # Set as active event
-            self.game_state["active_event"] = new_event
-            self.game_state["last_event_time"] = now
-            
-            # Create event display
-            self.event_display = EventDisplay(
-                self.display_config,
-                new_event
-            )
-            
-            # Update button bar
-            self.button_bar.update(
-                self.game_state["boost_points"],
-                self.game_state["boost_active"],
-                self.game_state["repair_points"],
-                len(self.game_state["damaged_systems"]),
-                True
-            )
+    def start_boost(self, seconds):
+        """Turn boost on, a timer turns it off after seconds"""
+        self.game_state["boost_active"] = True
+        self.spaceship.set_boost(True)
+        self.boost_timer = self.timers.schedule(seconds, self.end_boost)
+
+    def end_boost(self):
+        """Turn boost off when its timer runs out"""
+        self.game_state["boost_active"] = False
+        self.spaceship.set_boost(False)
+        self.state_store.mark_dirty()
+
+    def catch_up(self, seconds, boost_left, event_delay):
+        """
+        Credit seconds spent powered off or asleep in one step, then re-arm the boost and event timers
+
+        Args:
+            seconds: Time away
+            boost_left: Boost seconds that were left when the time away began
+            event_delay: Seconds from now until the next event is due, 0 if one fell due while away
+        """
+        progress = offline_progress(
+            seconds,
+            self.game_state["ship"]["speed"] / 10,
+            boost_left,
+            boost_multiplier=BOOST_SPEED_MULTIPLIER,
+            dark_matter=self.game_state["dark_matter"],
+            dark_matter_rate=DARK_MATTER_RATE,
+            storage_capacity=self.game_state["ship"]["storage_capacity"]
+        )
+        self.game_state["distance"] += progress.distance
+        self.game_state["dark_matter"] = progress.dark_matter
+        self.state_store.mark_dirty(seconds * PROGRESS_SAVE_WEIGHT)
+
+        # The timers run on game time, which stood still
+        if self.boost_timer:
+            self.boost_timer.cancel()
+        if progress.boost_left > 0:
+            self.game_state["boost_end_time"] = time.time() + progress.boost_left
+            self.start_boost(progress.boost_left)
+        elif self.game_state["boost_active"]:
+            self.end_boost()
+
+        # Events come every EVENT_INTERVAL counted from the last one, one that fell due opens now
+        self.event_scheduler.start(event_delay)
+
+    def open_event(self):
+        """Generate a new event when the event scheduler says one is due"""
+        # An event due while another is still open is skipped, the next one is an interval later
+        if self.game_state["active_event"] is not None:
+            return False
+
+        # Generate new event
+        new_event = self.event_generator.generate_event()
+
+        # Set as active event
+        self.game_state["active_event"] = new_event
+        self.game_state["last_event_time"] = time.time()
+        self.state_store.mark_dirty()
+
+        # Create event display
+        self.event_display = EventDisplay(
+            self.display_config,
+            new_event
+        )
+
+        # Update button bar
+        self.button_bar.update(
+            self.game_state["boost_points"],
+            self.game_state["boost_active"],
+            self.game_state["repair_points"],
+            len(self.game_state["damaged_systems"]),
+            True
+        )
             
     def update_stars(self):
         """Update star positions for parallax effect"""
         # Move stars based on ship speed
         speed_factor = 2 if self.game_state["boost_active"] else 1
-        
-        # Update small stars (slow movement)
-        for star in self.small_stars:
-            star['pos'][0] -= star['speed'] * speed_factor
-            if star['pos'][0] < 0:
-                star['pos'][0] = self.display_config.width
-                star['pos'][1] = pygame.time.get_ticks() % self.display_config.height
-                
-        # Update medium stars (medium movement)
-        for star in self.medium_stars:
-            star['pos'][0] -= star['speed'] * speed_factor
-            if star['pos'][0] < 0:
-                star['pos'][0] = self.display_config.width
-                star['pos'][1] = pygame.time.get_ticks() % self.display_config.height
-                
-        # Update large stars (fast movement)
-        for star in self.large_stars:
-            star['pos'][0] -= star['speed'] * speed_factor
-            if star['pos'][0] < 0:
-                star['pos'][0] = self.display_config.width
-                star['pos'][1] = pygame.time.get_ticks() % self.display_config.height
+        self.starfield.step(speed_factor)
+        self.starfield.interpolate()
                 
     def update(self):
         """Update game state"""
         now = time.time()
-        dt = now - self.last_update_time
-        self.last_update_time = now
-        
+        tick = time.monotonic()
+        dt = tick - self.last_update_time
+        self.last_update_time = tick
+
+        suspended = suspended_time()
+        if suspended - self.last_suspended > OFFLINE_GAP:
+            # The device slept, which the monotonic clock left out: credit the sleep in one step
+            boost_left = self.timers.remaining(self.boost_timer) if self.game_state["boost_active"] and self.boost_timer else 0
+            slept = suspended - self.last_suspended
+            self.catch_up(slept, boost_left, max(0, (self.event_scheduler.due_in or 0) - slept))
+            self.last_suspended = suspended
+
+        # Fire due timers: boost expiry, events, status bar rotation
+        self.timers.advance_to(tick - self.timer_origin)
+
         # Calculate current speed including boosts
         current_speed = self.game_state["ship"]["speed"]
         if self.game_state["boost_active"]:
-            if now < self.game_state["boost_end_time"]:
-                current_speed *= 2  # Double speed during boost
-            else:
-                # End boost if time is up
-                self.game_state["boost_active"] = False
-                self.spaceship.set_boost(False)
-                
+            current_speed *= BOOST_SPEED_MULTIPLIER
+
         # Add distance based on speed
         self.game_state["distance"] += current_speed * dt / 10
         
         # Passive Dark Matter collection (1 per second)
-        dark_matter_gain = 0.1 * dt
+        dark_matter_gain = DARK_MATTER_RATE * dt
         self.game_state["dark_matter"] = min(
             self.game_state["dark_matter"] + dark_matter_gain,
             self.game_state["ship"]["storage_capacity"]
         )
-        
-        # Check for events
-        self.process_event_generation()
+        self.state_store.mark_dirty(dt * PROGRESS_SAVE_WEIGHT)
         
         # Check for milestones
         self.check_milestones()
@@ -507,10 +536,8 @@ class IdleSpaceAdventure:
             self.game_state["damaged_systems"]
         )
         
-        # Save game state periodically (every 10 seconds)
-        if now - self.last_save_time > 10:
-            self.save_game_state()
-            self.last_save_time = now
+        # Save game state once enough has changed, the write happens off this thread
+        self.state_store.maybe_save()
             
         # Clear milestone display after 5 seconds
         if self.milestone_display and now - self.milestone_display.create_time > 5:
@@ -541,30 +568,10 @@ class IdleSpaceAdventure:
         # Clear the screen
         self.screen.fill((0, 0, 0))
         
-        # Draw stars
-        for star in self.small_stars:
-            pygame.draw.circle(
-                self.screen, 
-                star['color'], 
-                (int(star['pos'][0]), int(star['pos'][1])), 
-                star['size']
-            )
-            
-        for star in self.medium_stars:
-            pygame.draw.circle(
-                self.screen, 
-                star['color'], 
-                (int(star['pos'][0]), int(star['pos'][1])), 
-                star['size']
-            )
-            
-        for star in self.large_stars:
-            pygame.draw.circle(
-                self.screen, 
-                star['color'], 
-                (int(star['pos'][0]), int(star['pos'][1])), 
-                star['size']
-            )
+        # Draw stars straight into the screen pixels (surfarray is indexed x, y)
+        pixels = pygame.surfarray.pixels3d(self.screen)
+        self.starfield.draw(pixels.transpose(1, 0, 2))
+        del pixels  # Unlock the surface before blitting sprites
             
         # Draw all sprites
         self.all_sprites.draw(self.screen)
@@ -652,8 +659,9 @@ class IdleSpaceAdventure:
         except KeyboardInterrupt:
             pass
         finally:
-            # Save game state before exiting
+            # Save game state before exiting and wait for it to reach the card
             self.save_game_state()
+            self.state_store.close()
             
             # Clean up resources
             if self.gpio_handler: